@@ -0,0 +1,96 @@
+"""
+🏁 Micro-benchmark: title normalization
+Compares core.normalize against the original per-character implementation and
+checks that both produce exactly the same output.
+
+Run from scraper_api/: python benchmarks/bench_normalize.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.normalize import normalize_title, normalize_titles, _normalize  # noqa: E402
+
+
+def legacy_normalize_title(title: str) -> str:
+    """The original SupabaseService._normalize_title"""
+    if not title:
+        return ""
+
+    normalized = title.lower()
+    normalized = ''.join(c for c in normalized if c.isalnum() or c.isspace())
+    normalized = ' '.join(normalized.split())
+
+    return normalized
+
+
+SAMPLE_TITLES = [
+    "Cyberpunk 2077",
+    "Cyberpunk 2077 – Ultimate Edition",
+    "The Witcher® 3: Wild Hunt - Game of the Year Edition",
+    "Tom Clancy's Rainbow Six® Siege",
+    "FINAL FANTASY VII REMAKE INTERGRADE",
+    "Baldur's Gate 3",
+    "DRAGON BALL Z: KAKAROT",
+    "Pokémon™ Légendes",
+    "NieR:Automata™",
+    "Ōkami HD",
+    "İstanbul Kıyamet Vakti",
+    "ダンガンロンパ 1・2 Reload",
+    "  Spaced \t out\n title  ",
+    "",
+]
+
+
+def check_equivalence():
+    """Exact output parity on sample titles and on every Unicode code point"""
+    for title in SAMPLE_TITLES:
+        assert normalize_title(title) == legacy_normalize_title(title), title
+
+    for codepoint in range(sys.maxunicode + 1):
+        if 0xD800 <= codepoint <= 0xDFFF:
+            continue  # Lone surrogates can't appear in decoded JSON titles
+        text = f"a{chr(codepoint)}b {chr(codepoint).upper()}"
+        assert _normalize(text) == legacy_normalize_title(text), hex(codepoint)
+
+    print("✅ Output identical to the legacy implementation (samples + all code points)")
+
+
+def main():
+    check_equivalence()
+
+    rng = random.Random(42)
+    # A search batch: 20 results, many titles repeated across searches
+    titles = [rng.choice(SAMPLE_TITLES) + f" {rng.randint(0, 200)}" for _ in range(20000)]
+    unique_titles = list(dict.fromkeys(titles))
+    number = 5
+
+    def run(label, fn):
+        seconds = min(timeit.repeat(fn, number=number, repeat=3)) / number
+        print(f"{label:<38} {seconds * 1000:8.2f} ms / {len(titles)} titles")
+        return seconds
+
+    ascii_titles = [t for t in titles if t.isascii()]
+    print(f"ASCII-only subset ({len(ascii_titles)} titles, the common case):")
+    ascii_legacy = min(timeit.repeat(lambda: [legacy_normalize_title(t) for t in ascii_titles], number=number, repeat=3))
+    ascii_fast = min(timeit.repeat(lambda: [_normalize(t) for t in ascii_titles], number=number, repeat=3))
+    print(f"  bytes.translate fast path speedup: {ascii_legacy / ascii_fast:.1f}x\n")
+
+    print("Mixed titles:")
+    legacy = run("legacy (generator join)", lambda: [legacy_normalize_title(t) for t in titles])
+    translate = run("translate, no memo", lambda: [_normalize(t) for t in titles])
+    normalize_titles(titles)  # Warm the memo, as repeated searches would
+    memo = run("translate + LRU memo", lambda: [normalize_title(t) for t in titles])
+    batch = run("normalize_titles() batch", lambda: normalize_titles(titles))
+
+    print(f"\n{len(unique_titles)} unique titles")
+    print(f"translate speedup: {legacy / translate:.1f}x")
+    print(f"memo speedup:      {legacy / memo:.1f}x")
+    print(f"batch speedup:     {legacy / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
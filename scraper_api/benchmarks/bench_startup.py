@@ -0,0 +1,144 @@
+"""
+🏁 Startup benchmark: cold import time and time-to-first-response
+Imports main in fresh interpreters, lists the slowest imports, then boots uvicorn
+and polls /health and /ready until they answer.
+
+Run from scraper_api/: python benchmarks/bench_startup.py [--runs 5] [--ready-timeout 30]
+Without real Supabase credentials the database check fails, so /ready stays 503;
+/health (the time-to-first-response figure) does not depend on it.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only load when a request actually needs them
+LAZY_MODULES = ('playwright', 'supabase', 'bs4', 'uvicorn')
+
+IMPORT_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def app_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # SupabaseService only checks that credentials exist; an unroutable URL keeps the run offline
+    env.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+    env.setdefault('SUPABASE_SERVICE_KEY', 'benchmark')
+    env.setdefault('PRICE_REFRESH_ENABLED', 'false')
+    env.setdefault('STEAM_APP_INDEX_ENABLED', 'false')
+    return env
+
+
+def measure_import(runs: int) -> Tuple[List[float], List[str]]:
+    """Seconds to import main in fresh interpreters, and the heavy modules it pulled in"""
+    timings, loaded = [], []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_PROBE], cwd=APP_DIR, env=app_env(),
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result['seconds'])
+        loaded = result['loaded']
+    return timings, loaded
+
+
+def slowest_imports(limit: int = 10) -> List[Tuple[int, str]]:
+    """Top-level packages by cumulative import time (microseconds), from -X importtime"""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=APP_DIR, env=app_env(),
+        capture_output=True, text=True, check=True
+    ).stderr
+
+    packages: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        root = name.strip().split('.')[0]
+        packages[root] = max(packages.get(root, 0), int(cumulative))
+    return sorted(((us, name) for name, us in packages.items() if name != 'main'), reverse=True)[:limit]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def poll(url: str, started: float, timeout: float) -> Tuple[Optional[float], Optional[int]]:
+    """Seconds from started until url answers 200, and the last status seen"""
+    status = None
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        if status == 200:
+            return time.perf_counter() - started, status
+        time.sleep(0.01)
+    return None, status
+
+
+def measure_first_response(ready_timeout: float) -> Dict[str, Optional[float]]:
+    """Boot uvicorn and time the first /health and /ready answers"""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=APP_DIR, env=app_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        health, _ = poll(f"{base}/health", started, 60)
+        ready, ready_status = poll(f"{base}/ready", started, ready_timeout)
+        return {'health': health, 'ready': ready, 'ready_status': ready_status}
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--ready-timeout', type=float, default=10.0)
+    args = parser.parse_args()
+
+    timings, loaded = measure_import(args.runs)
+    print(f"import main: median {statistics.median(timings) * 1000:.0f} ms, "
+          f"min {min(timings) * 1000:.0f} ms over {args.runs} runs")
+    print(f"heavy modules loaded at import: {', '.join(loaded) or 'none'}")
+
+    print("\nslowest top-level imports (cumulative):")
+    for microseconds, name in slowest_imports():
+        print(f"  {name:<24} {microseconds / 1000:8.1f} ms")
+
+    response = measure_first_response(args.ready_timeout)
+    print(f"\nprocess start -> first /health 200: "
+          f"{response['health'] * 1000:.0f} ms" if response['health'] is not None else "\n/health never answered")
+    if response['ready'] is not None:
+        print(f"process start -> /ready 200:        {response['ready'] * 1000:.0f} ms")
+    else:
+        print(f"/ready not 200 after {args.ready_timeout:.0f}s (last status {response['ready_status']}), "
+              f"startup checks still running or failing")
+
+
+if __name__ == "__main__":
+    main()
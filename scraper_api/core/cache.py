@@ -0,0 +1,305 @@
+"""
+TTL caches for search results and store prices
+In-process LRU tier plus an optional shared SQLite tier, with stale-while-revalidate
+"""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+
+from core import metrics
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so equivalent searches share a cache key"""
+    return ' '.join(query.lower().split())
+
+
+class CacheEntry:
+    """A cached value and when it was stored"""
+
+    __slots__ = ('value', 'stored_at', 'size')
+
+    def __init__(self, value: Any, stored_at: float, size: int):
+        self.value = value
+        self.stored_at = stored_at
+        self.size = size
+
+    @property
+    def age(self) -> float:
+        """Seconds since the entry was stored"""
+        return max(0.0, time.time() - self.stored_at)
+
+
+class LRUCacheTier:
+    """In-process LRU bounded by entry count and approximate payload size"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+
+        self._entries[key] = entry
+        self._bytes += entry.size
+
+        # Evict least recently used entries until both limits hold
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheTier:
+    """
+    Shared tier backed by a local SQLite file so several workers can reuse results.
+    Every write purges rows older than max_age and keeps at most max_entries (newest first).
+    """
+
+    def __init__(self, path: str, max_age: float, max_entries: int):
+        self.path = path
+        self.max_age = max_age
+        self.max_entries = max(1, max_entries)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS search_cache_stored_at ON search_cache (stored_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _get(self, key: str) -> Optional[CacheEntry]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, stored_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1], len(row[0]))
+
+    def _set(self, key: str, payload: str, stored_at: float):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, payload, stored_at)
+            )
+            conn.execute("DELETE FROM search_cache WHERE stored_at < ?", (time.time() - self.max_age,))
+            conn.execute(
+                "DELETE FROM search_cache WHERE key IN "
+                "(SELECT key FROM search_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, payload: str, stored_at: float):
+        await asyncio.to_thread(self._set, key, payload, stored_at)
+
+
+class SearchCache:
+    """Search-result cache keyed on (store, normalized query)"""
+
+    def __init__(self, ttl_seconds: float, stale_seconds: float,
+                 max_entries: int, max_bytes: int, shared_path: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.local = LRUCacheTier(max_entries, max_bytes)
+        self.shared: Optional[SQLiteCacheTier] = None
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        if shared_path:
+            try:
+                self.shared = SQLiteCacheTier(shared_path, ttl_seconds + stale_seconds, max_entries)
+            except Exception as e:
+                logger.warning(f"Shared search cache disabled ({shared_path}): {e}")
+
+    @staticmethod
+    def make_key(store: str, query: str) -> str:
+        return f"{store}:{normalize_query(query)}"
+
+    async def get(self, store: str, query: str) -> Optional[CacheEntry]:
+        """Look up an entry that is still fresh or within the stale window"""
+        key = self.make_key(store, query)
+        entry = self.local.get(key)
+
+        if entry is None and self.shared is not None:
+            try:
+                entry = await self.shared.get(key)
+            except Exception as e:
+                logger.warning(f"Shared cache read failed for {key}: {e}")
+            if entry is not None:
+                self.local.set(key, entry)
+
+        if entry is None or entry.age > self.ttl_seconds + self.stale_seconds:
+            return None
+        return entry
+
+    async def set(self, store: str, query: str, value: Any):
+        """Store a value in both tiers"""
+        key = self.make_key(store, query)
+        payload = json.dumps(value, default=str)
+        stored_at = time.time()
+        self.local.set(key, CacheEntry(value, stored_at, len(payload)))
+
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, payload, stored_at)
+            except Exception as e:
+                logger.warning(f"Shared cache write failed for {key}: {e}")
+
+    def is_stale(self, entry: CacheEntry) -> bool:
+        return entry.age > self.ttl_seconds
+
+    def refresh_in_background(self, store: str, query: str,
+                              loader: Callable[[], Awaitable[Tuple[Any, bool]]]):
+        """
+        Revalidate a stale entry without blocking the caller.
+        loader returns (value, cacheable); only one refresh per key runs at a time.
+        """
+        key = self.make_key(store, query)
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                value, cacheable = await loader()
+                if cacheable:
+                    await self.set(store, query, value)
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {key}: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self.local),
+            'bytes': self.local.bytes,
+            'shared': self.shared is not None,
+            'refreshing': len(self._refreshing)
+        }
+
+
+class PriceCache:
+    """
+    Short-lived price cache keyed by (store, steam_app_id/epic_slug).
+    Concurrent lookups for the same key share one in-flight fetch.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self._entries = LRUCacheTier(max_entries, max_bytes=max_entries)
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def peek(self, store: str, key: str) -> Optional[Any]:
+        """Return a fresh cached price without fetching"""
+        entry = self._entries.get(f"{store}:{key}")
+        if entry is None or entry.age > self.ttl_seconds:
+            return None
+        return entry.value
+
+    def put(self, store: str, key: str, value: Any):
+        """Remember a price fetched elsewhere (e.g. from search results)"""
+        if value is not None:
+            self._entries.set(f"{store}:{key}", CacheEntry(value, time.time(), 1))
+
+    async def get_many(self, store: str, keys: Iterable[Any],
+                       fetcher: Callable[[List[str]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Resolve prices for many keys. Fresh entries come from cache, keys already
+        being fetched join that fetch, and the rest go to fetcher in one call.
+        """
+        prices: Dict[str, Any] = {}
+        pending: Dict[str, asyncio.Future] = {}
+        missing: List[str] = []
+
+        for key in dict.fromkeys(str(k) for k in keys if k):
+            cached = self.peek(store, key)
+            if cached is not None:
+                prices[key] = cached
+            elif (store, key) in self._inflight:
+                pending[key] = self._inflight[(store, key)]
+            else:
+                missing.append(key)
+
+        metrics.cache_requests.labels('price', 'hit').inc(len(prices))
+        metrics.cache_requests.labels('price', 'miss').inc(len(pending) + len(missing))
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            for key in missing:
+                future = loop.create_future()
+                self._inflight[(store, key)] = future
+                pending[key] = future
+
+            # Run the fetch as its own task so a cancelled caller doesn't strand the others
+            task = asyncio.create_task(self._fetch(store, missing, fetcher))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        for key, future in pending.items():
+            prices[key] = await asyncio.shield(future)
+
+        return prices
+
+    async def _fetch(self, store: str, keys: List[str],
+                     fetcher: Callable[[List[str]], Awaitable[Dict[str, Any]]]):
+        fetched: Dict[str, Any] = {}
+        try:
+            fetched = await fetcher(keys) or {}
+        except Exception as e:
+            logger.warning(f"{store} price fetch failed for {len(keys)} keys: {e}")
+            metrics.store_errors.labels(store, 'price').inc()
+        finally:
+            for key in keys:
+                value = fetched.get(key)
+                self.put(store, key, value)
+                future = self._inflight.pop((store, key), None)
+                if future is not None and not future.done():
+                    future.set_result(value)
+
+
+search_cache = SearchCache(
+    ttl_seconds=settings.cache_ttl_minutes * 60,
+    stale_seconds=settings.cache_stale_minutes * 60,
+    max_entries=settings.cache_max_entries,
+    max_bytes=settings.cache_max_bytes,
+    shared_path=settings.cache_shared_path
+)
+
+price_cache = PriceCache(
+    ttl_seconds=settings.price_cache_ttl_minutes * 60,
+    max_entries=settings.price_cache_max_entries
+)
@@ -2,7 +2,7 @@
 Configuration settings for GamePrice Scraper API
 """
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +10,7 @@ class Settings(BaseSettings):
     # Supabase
     supabase_url: str = os.getenv("SUPABASE_URL", "")
     supabase_service_key: str = os.getenv("SUPABASE_SERVICE_KEY", "")
+    supabase_pool_size: int = 4  # worker threads running blocking Supabase calls
 
     # Gemini AI
     gemini_api_key: Optional[str] = os.getenv("GEMINI_API_KEY")
@@ -18,20 +19,101 @@ class Settings(BaseSettings):
     scraper_api_url: Optional[str] = os.getenv("SCRAPER_API_URL")
 
     # Scraping settings
-    max_concurrent_requests: int = 2  # Don't overwhelm stores
+    max_concurrent_requests: int = 2  # Don't overwhelm stores (also bounds wishlist refresh fan-out)
     request_timeout: int = 30  # seconds
     max_retries: int = 3
+    steam_price_batch_size: int = 50  # app IDs per batched appdetails call
+    steam_price_fetch_concurrency: int = 4  # single appdetails calls in flight when batching fails
+    store_search_timeout: float = 15.0  # seconds per store before returning partial results
+
+    # HTTP client pool (shared by all store requests)
+    http2_enabled: bool = True
+    http_max_connections_per_host: int = 10
+    http_max_keepalive_per_host: int = 5
+    http_keepalive_expiry: float = 30.0  # seconds
+    http_host_limits: Dict[str, int] = {}  # e.g. {"store.steampowered.com": 4}
+
+    # Shared Playwright browser pool
+    browser_pool_enabled: bool = os.getenv("BROWSER_POOL_ENABLED", "true").lower() == "true"
+    browser_max_pages: int = 4  # concurrent pages across all scrapers
+    browser_context_max_uses: int = 20  # recycle a context after this many borrows
+    browser_start_retry_seconds: float = 60.0  # wait before relaunching after a failed launch
+    # Lean pages: blocklists applied in the browser, JS off where not needed, no networkidle waits
+    browser_lean_mode: bool = os.getenv("BROWSER_LEAN_MODE", "true").lower() == "true"
+    browser_blocked_domains: List[str] = [
+        'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+        'facebook.net', 'facebook.com', 'hotjar.com', 'segment.io', 'sentry.io', 'newrelic.com',
+        'nr-data.net', 'demdex.net', 'omtrdc.net', 'branch.io', 'onetrust.com', 'cookielaw.org',
+    ]
+    browser_blocked_extensions: List[str] = [
+        'png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'css', 'woff', 'woff2', 'ttf', 'otf',
+        'mp4', 'webm', 'm3u8', 'mp3',
+    ]
+
+    # Price history write buffer
+    price_history_batch_rows: int = 200  # rows per multi-row insert
+    price_history_flush_interval: float = 5.0  # seconds between periodic flushes
+    price_history_max_buffered_rows: int = 5000  # oldest rows are dropped beyond this
+
+    # Catalog index (answer searches for known games without scraping)
+    catalog_index_enabled: bool = os.getenv("CATALOG_INDEX_ENABLED", "true").lower() == "true"
+    catalog_min_score: float = 0.6
+    catalog_max_results: int = 20
+    catalog_price_max_age_minutes: int = 60  # stored prices older than this trigger a scrape
+
+    # Offline Steam app index (name -> appid without a storesearch call)
+    steam_app_index_enabled: bool = os.getenv("STEAM_APP_INDEX_ENABLED", "true").lower() == "true"
+    steam_app_index_path: str = os.getenv("STEAM_APP_INDEX_PATH", "data/steam_apps")
+    steam_app_index_refresh_hours: float = 24.0
+    steam_app_index_retry_seconds: float = 300.0  # wait before retrying a failed build
+
+    # Cross-store title matching (Dice score over canonical title tokens)
+    title_match_threshold: float = 0.8
+
+    # Background price refresher
+    price_refresh_enabled: bool = os.getenv("PRICE_REFRESH_ENABLED", "false").lower() == "true"
+    price_refresh_interval_minutes: int = 30
+    price_refresh_min_age_minutes: int = 60  # skip games priced more recently than this
+    price_refresh_batch_size: int = 200  # max games per cycle
+    price_refresh_jitter_seconds: float = 2.0
+
+    # Epic catalog API (searched over HTTP before falling back to the browser)
+    epic_graphql_url: str = os.getenv("EPIC_GRAPHQL_URL", "https://graphql.epicgames.com/graphql")
+    epic_free_games_url: str = os.getenv(
+        "EPIC_FREE_GAMES_URL", "https://store-site-backend-static.ak.epicgames.com/freeGamesPromotions"
+    )
 
     # Rate limiting (per minute)
     steam_rate_limit: int = 20
     epic_rate_limit: int = 20
+    rate_limit_burst: int = 5  # requests a store may take back-to-back before queueing
+    rate_limit_max_wait: float = 20.0  # seconds a request may queue for a token
+    retry_backoff_base: float = 0.5  # seconds, doubled on every retry
+    retry_backoff_max: float = 30.0
 
     # Cache settings
     cache_ttl_minutes: int = 60  # Cache search results for 1 hour
+    cache_stale_minutes: int = 30  # Serve stale results this long while refreshing in background
+    cache_max_entries: int = 500
+    cache_max_bytes: int = 20 * 1024 * 1024  # approximate JSON size of cached results
+    cache_shared_path: Optional[str] = os.getenv("CACHE_SHARED_PATH")  # SQLite file shared by workers
+    price_cache_ttl_minutes: int = 10  # Reuse a store price across users for this long
+    price_cache_max_entries: int = 5000
 
     # Debug mode
     debug_mode: bool = os.getenv("DEBUG_MODE", "false").lower() == "true"
 
+    # Request profiling: requests carrying this key (X-Debug-Profile header or
+    # ?debug_profile=) are profiled; empty disables it
+    debug_profile_key: str = os.getenv("DEBUG_PROFILE_KEY", "")
+    profile_dir: str = os.getenv("PROFILE_DIR", "data/profiles")
+    profile_sample_interval_ms: float = 5.0
+    profile_max_files: int = 20  # oldest reports are deleted beyond this
+
+    # Event loop lag monitor: logs the loop thread's stack when a callback blocks it this long
+    loop_lag_monitor_enabled: bool = os.getenv("LOOP_LAG_MONITOR_ENABLED", "true").lower() == "true"
+    loop_lag_threshold_ms: float = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "250"))
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,191 @@
+"""
+Shared async HTTP client layer for store requests
+One pooled keep-alive client per store host, opened at startup and closed at shutdown
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Any
+from urllib.parse import urlsplit
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import asyncio
+import logging
+import random
+import time
+import httpx
+
+from core.config import settings
+from core.rate_limiter import rate_limiters
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json, text/html;q=0.9, */*;q=0.8',
+}
+
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date)"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_seconds(attempt: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(settings.retry_backoff_max, settings.retry_backoff_base * 2 ** attempt))
+
+
+class HttpClientManager:
+    """Owns one httpx.AsyncClient per host so connections are reused across requests"""
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._started = False
+        self._retries = 0
+        self._throttled = 0
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    async def start(self):
+        """Open the client layer (clients are created lazily per host)"""
+        self._started = True
+        logger.info("🌐 HTTP client pool ready")
+
+    async def close(self):
+        """Close every pooled client and drop its connections"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._started = False
+
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"HTTP client cleanup warning: {e}")
+
+        if clients:
+            logger.info(f"🧹 Closed {len(clients)} pooled HTTP clients")
+
+    def _limits_for(self, host: str) -> httpx.Limits:
+        """Connection limits for a host, honoring per-host overrides"""
+        max_connections = settings.http_host_limits.get(host, settings.http_max_connections_per_host)
+        return httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(settings.http_max_keepalive_per_host, max_connections),
+            keepalive_expiry=settings.http_keepalive_expiry
+        )
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Get (or create) the pooled client for the URL's host"""
+        host = urlsplit(url).netloc
+        client = self._clients.get(host)
+
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=settings.http2_enabled,
+                limits=self._limits_for(host),
+                timeout=httpx.Timeout(settings.request_timeout),
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True
+            )
+            self._clients[host] = client
+
+        return client
+
+    async def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """
+        Send a request through the pooled client for the URL's host.
+        Store hosts go through their rate limiter; 429/5xx and transport errors are
+        retried up to max_retries with exponential backoff, honoring Retry-After.
+        """
+        client = self.client_for(url)
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+
+        bucket = rate_limiters.for_url(url)
+        deadline = time.monotonic() + settings.rate_limit_max_wait
+        max_retries = max(0, settings.max_retries)
+
+        for attempt in range(max_retries + 1):
+            if bucket is not None:
+                await bucket.acquire(deadline)
+
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == max_retries:
+                    raise
+                self._retries += 1
+                delay = backoff_seconds(attempt)
+                logger.warning(f"{method} {url} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+
+            self._retries += 1
+            retry_after = retry_after_seconds(response)
+            delay = retry_after if retry_after is not None else backoff_seconds(attempt)
+            if response.status_code == 429:
+                self._throttled += 1
+            logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+
+            if bucket is not None:
+                # The store told us to back off: hold every request to it, not just this one
+                bucket.pause(delay)
+                deadline = max(deadline, time.monotonic() + delay)
+            else:
+                await asyncio.sleep(delay)
+
+        return response
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+                  timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """GET through the pooled, rate-limited client for the URL's host"""
+        return await self.request('GET', url, params=params, timeout=timeout, **kwargs)
+
+    async def post(self, url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """POST through the pooled, rate-limited client for the URL's host"""
+        return await self.request('POST', url, timeout=timeout, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, timeout: Optional[float] = None,
+                     **kwargs) -> AsyncIterator[httpx.Response]:
+        """Stream a large response body through the pooled, rate-limited client (no retries)"""
+        client = self.client_for(url)
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+
+        bucket = rate_limiters.for_url(url)
+        if bucket is not None:
+            await bucket.acquire(time.monotonic() + settings.rate_limit_max_wait)
+
+        async with client.stream(method, url, **kwargs) as response:
+            yield response
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'clients': len(self._clients),
+            'retries': self._retries,
+            'throttled': self._throttled,
+            'rate_limiters': rate_limiters.stats(),
+        }
+
+http_client = HttpClientManager()
@@ -0,0 +1,252 @@
+"""
+Prometheus metrics without extra dependencies
+Histograms and counters with label children created up front, timed with
+time.perf_counter and rendered in the Prometheus text exposition format
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from itertools import product
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import time
+
+# Seconds; spans cache hits (~ms) up to full browser scrapes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.sum += seconds
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the block (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 label_values: Optional[Dict[str, Iterable[str]]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+        # Preallocate every known label combination so the hot path is one dict lookup
+        if label_values:
+            for values in product(*(tuple(label_values[name]) for name in self.label_names)):
+                self._children[values] = self._new_child()
+        elif not self.label_names:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            # Unexpected label values still work, they are just created on first use
+            child = self._children.setdefault(tuple(str(value) for value in values), self._new_child())
+        return child
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    @property
+    def family(self) -> str:
+        return self.name
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.family} {self.documentation}",
+            f"# TYPE {self.family} {self.kind}",
+            *self._samples()
+        ]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 label_values: Optional[Dict[str, Iterable[str]]] = None,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, label_names, label_values)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, seconds: float):
+        self.labels().observe(seconds)
+
+    def time(self):
+        return self.labels().time()
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, values, le)} {cumulative}")
+            labels = _format_labels(self.label_names, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    @property
+    def family(self) -> str:
+        return f"{self.name}_total"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.family}{_format_labels(self.label_names, values)} {_format_value(child.value)}"
+            for values, child in self._children.items()
+        ]
+
+
+class MetricsRegistry:
+    """Every metric exposed on /metrics"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request (streamed bodies included) by route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; templates keep label cardinality bounded
+            route = getattr(scope.get('route'), 'path', 'unmatched')
+            request_seconds.labels(scope['method'], route, f"{status // 100}xx").observe(
+                time.perf_counter() - started
+            )
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+STORES = ('steam', 'epic')
+# How a scraper got its data: Epic catalog API, browser, or plain HTTP fallback
+SCRAPE_PATHS = ('catalog', 'playwright', 'http')
+SEARCH_STAGES = ('steam_search', 'epic_search', 'catalog_search', 'match_merge', 'price_resolution', 'search_total')
+CACHES = ('search', 'price', 'catalog')
+# Operation names SupabaseService._execute is called with
+SUPABASE_OPERATIONS = (
+    'test_connection', 'warm_up', 'load_catalog', 'find_games', 'insert_games', 'update_games',
+    'save_price_history', 'add_to_wishlist', 'get_game_by_id', 'log_user_search', 'get_games_by_ids',
+    'get_wishlist_watchers', 'get_wishlist_targets', 'get_target_notifications', 'get_latest_prices',
+    'create_notifications',
+    'save_ai_insight', 'get_price_history',
+)
+
+registry = MetricsRegistry()
+
+request_seconds = registry.register(Histogram(
+    'gameprice_http_request_seconds', 'HTTP request latency by route',
+    ('method', 'route', 'status')
+))
+stage_seconds = registry.register(Histogram(
+    'gameprice_search_stage_seconds', 'Search pipeline stage latency',
+    ('stage',), {'stage': SEARCH_STAGES}
+))
+scrape_seconds = registry.register(Histogram(
+    'gameprice_scrape_seconds', 'Store scrape latency by path',
+    ('store', 'operation', 'path'), {'store': STORES, 'operation': ('search', 'details'), 'path': SCRAPE_PATHS}
+))
+supabase_seconds = registry.register(Histogram(
+    'gameprice_supabase_call_seconds', 'Supabase round-trip latency by operation',
+    ('operation',), {'operation': SUPABASE_OPERATIONS}
+))
+notification_seconds = registry.register(Histogram(
+    'gameprice_notification_evaluation_seconds', 'Notification evaluation latency'
+))
+fallbacks = registry.register(Counter(
+    'gameprice_scraper_fallbacks', 'Scrape paths that failed and fell back to the next one',
+    ('store', 'path'), {'store': STORES, 'path': SCRAPE_PATHS}
+))
+cache_requests = registry.register(Counter(
+    'gameprice_cache_requests', 'Cache lookups by result',
+    ('cache', 'result'), {'cache': CACHES, 'result': ('hit', 'miss')}
+))
+store_errors = registry.register(Counter(
+    'gameprice_store_errors', 'Store requests that failed or timed out',
+    ('store', 'kind'), {'store': STORES, 'kind': ('search', 'timeout', 'price')}
+))
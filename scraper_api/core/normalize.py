@@ -0,0 +1,49 @@
+"""
+Title normalization shared by matching, the catalog and the Steam app index
+Output is identical to the original per-character implementation (stored
+normalized_title values stay valid), but runs on str.translate with a memo
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+
+class _KeepAlnumSpace(Dict[int, Optional[int]]):
+    """str.translate table keeping alphanumeric and whitespace code points, filled lazily"""
+
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        char = chr(codepoint)
+        kept = codepoint if char.isalnum() or char.isspace() else None
+        self[codepoint] = kept
+        return kept
+
+
+_TABLE = _KeepAlnumSpace()
+
+# ASCII fast path: bytes.translate deletes these in one C pass
+_ASCII_DELETE = bytes(c for c in range(128) if not (chr(c).isalnum() or chr(c).isspace()))
+
+
+def _normalize(title: str) -> str:
+    # Lowercase, drop everything but letters/digits/whitespace, collapse whitespace
+    if title.isascii():
+        return ' '.join(title.lower().encode().translate(None, _ASCII_DELETE).decode().split())
+    return ' '.join(title.lower().translate(_TABLE).split())
+
+
+@lru_cache(maxsize=65536)
+def _normalize_cached(title: str) -> str:
+    return _normalize(title)
+
+
+def normalize_title(title: str) -> str:
+    """Normalize game title for matching"""
+    if not title:
+        return ""
+    return _normalize_cached(title)
+
+
+def normalize_titles(titles: Iterable[str]) -> List[str]:
+    """Normalize many titles at once; duplicates are normalized only once"""
+    titles = list(titles)
+    normalized = {title: normalize_title(title) for title in dict.fromkeys(titles)}
+    return [normalized[title] for title in titles]
@@ -0,0 +1,267 @@
+"""
+Opt-in request profiling and an event loop lag monitor
+A profiled request runs under cProfile on the event loop thread while a sampler
+thread records wall-clock stacks of every thread (Supabase workers included) from
+sys._current_frames(), so time spent in worker threads shows up next to the calls
+that block the loop. Both cover everything the process runs meanwhile, not just
+the profiled request.
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+from uuid import uuid4
+import asyncio
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import traceback
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b'x-debug-profile'
+PROFILE_QUERY = 'debug_profile'
+PROFILE_ID = re.compile(r'^\d{8}T\d{6}-[0-9a-f]{8}$')
+PROFILES_PATH = '/debug/profiles/'
+STACK_LIMIT = 25  # innermost frames logged for a blocked loop
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame) -> List[str]:
+    """Frame names from the outermost call to the current one"""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def profile_requested(scope: Dict[str, Any]) -> bool:
+    """Whether the request carries the debug profile key (header or query flag)"""
+    key = settings.debug_profile_key
+    if not key:
+        return False
+
+    supplied = dict(scope.get('headers') or []).get(PROFILE_HEADER, b'').decode('latin-1')
+    if not supplied:
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        supplied = (query.get(PROFILE_QUERY) or [''])[0]
+    return bool(supplied) and hmac.compare_digest(supplied.encode(), key.encode())
+
+
+class RequestProfiler:
+    """cProfile on the loop thread plus wall-clock stack samples of the whole process"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()  # collapsed stack -> sample count
+        self.elapsed = 0.0
+        self._loop_thread_id = threading.get_ident()
+        self._profile = cProfile.Profile()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name='request-profiler', daemon=True)
+        self._thread.start()
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread in threading.enumerate():
+                if thread.ident == threading.get_ident():
+                    continue
+                frame = frames.get(thread.ident)
+                if frame is not None:
+                    label = 'loop' if thread.ident == self._loop_thread_id else f"thread:{thread.name}"
+                    self.samples[';'.join([label] + _thread_stack(frame))] += 1
+
+    def report(self, method: str, path: str) -> str:
+        out = io.StringIO()
+        out.write(f"# {method} {path} profiled at {datetime.utcnow().isoformat()}: "
+                  f"{self.elapsed:.3f}s wall, sampled every {self.interval * 1000:.0f}ms\n")
+        out.write("# Note: samples and cProfile cover the whole process while this request ran, "
+                  "including concurrent requests and background tasks on the same loop\n")
+
+        out.write("\n== Wall-clock samples (collapsed stacks: 'frame;frame;... count', "
+                  "for flamegraph.pl or speedscope) ==\n")
+        out.write("# loop = event loop thread, thread:* = worker threads\n")
+        for stack, count in self.samples.most_common():
+            out.write(f"{stack} {count}\n")
+
+        out.write("\n== cProfile: event loop thread (CPU and blocking calls, every coroutine on the loop), "
+                  "top 40 by cumulative time ==\n")
+        pstats.Stats(self._profile, stream=out).sort_stats('cumulative').print_stats(40)
+        return out.getvalue()
+
+
+def new_profile_id() -> str:
+    return f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid4().hex[:8]}"
+
+
+def save_report(profile_id: str, report: str):
+    """Write a report to the profile directory, keeping only the newest files"""
+    os.makedirs(settings.profile_dir, exist_ok=True)
+    with open(os.path.join(settings.profile_dir, f"{profile_id}.txt"), 'w', encoding='utf-8') as out:
+        out.write(report)
+
+    reports = sorted(name for name in os.listdir(settings.profile_dir) if name.endswith('.txt'))
+    for name in reports[:-max(1, settings.profile_max_files)]:
+        try:
+            os.remove(os.path.join(settings.profile_dir, name))
+        except OSError:
+            pass
+
+
+def load_report(profile_id: str) -> Optional[str]:
+    if not PROFILE_ID.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(settings.profile_dir, f"{profile_id}.txt"), encoding='utf-8') as report:
+            return report.read()
+    except FileNotFoundError:
+        return None
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request that carries the debug key and stores the report.
+    The response gets an X-Debug-Profile-Id header; fetch the report from /debug/profiles/{id}.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = False  # cProfile can't nest: one profiled request at a time
+
+    async def __call__(self, scope, receive, send):
+        # Fetching a report sends the key too, but isn't worth profiling
+        if scope['type'] != 'http' or scope['path'].startswith(PROFILES_PATH) or not profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if self._busy:
+            logger.warning(f"🔬 Profiler busy, not profiling {scope['method']} {scope['path']}")
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_profile_id()
+
+        async def send_with_profile_id(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = list(message.get('headers') or []) + [
+                    (b'x-debug-profile-id', profile_id.encode())
+                ]
+            await send(message)
+
+        self._busy = True
+        profiler = RequestProfiler(settings.profile_sample_interval_ms / 1000)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            self._busy = False
+            report = profiler.report(scope['method'], scope['path'])
+            await asyncio.get_running_loop().run_in_executor(None, save_report, profile_id, report)
+            logger.info(f"🔬 Profiled {scope['method']} {scope['path']} ({profiler.elapsed:.2f}s): {profile_id}")
+
+
+class LoopLagMonitor:
+    """
+    Watchdog thread for the event loop: a heartbeat callback runs on the loop and,
+    when it is late by more than the threshold, the loop thread's stack is logged
+    while the blocking call is still running
+    """
+
+    def __init__(self, threshold_ms: float):
+        self.threshold = threshold_ms / 1000
+        self.interval = self.threshold / 2  # heartbeat period
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start watching the running loop (call from the loop thread)"""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._last_beat = time.monotonic()
+        self._handle = self._loop.call_later(self.interval, self._beat)
+        self._thread = threading.Thread(target=self._watch, name='loop-lag-monitor', daemon=True)
+        self._thread.start()
+        logger.info(f"🐢 Event loop lag monitor started (threshold {self.threshold * 1000:.0f}ms)")
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _beat(self):
+        now = time.monotonic()
+        self.max_lag = max(self.max_lag, now - self._last_beat - self.interval)
+        self._last_beat = now
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stop.wait(self.interval / 2):
+            beat = self._last_beat
+            lag = time.monotonic() - beat - self.interval
+            if lag < self.threshold or beat == reported_beat:
+                continue
+
+            # One report per stall, taken while the loop is still blocked
+            reported_beat = beat
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = ''.join(traceback.format_stack(frame, limit=STACK_LIMIT)) if frame is not None else '(no frame)\n'
+            logger.warning(
+                f"🐢 Event loop blocked for {lag * 1000:.0f}ms "
+                f"(threshold {self.threshold * 1000:.0f}ms), loop thread is at:\n{stack}"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'running': self._thread is not None,
+            'threshold_ms': self.threshold * 1000,
+            'stalls': self.stalls,
+            'max_lag_ms': round(self.max_lag * 1000, 2),
+        }
+
+
+loop_lag_monitor = LoopLagMonitor(settings.loop_lag_threshold_ms)
@@ -0,0 +1,125 @@
+"""
+Async token-bucket rate limiting per store
+Shared by every HTTP call to a store so bursts queue instead of triggering 429s
+"""
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+import asyncio
+import logging
+import time
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitTimeout(Exception):
+    """A request waited longer than its deadline for a token"""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_minute, holding up to burst tokens"""
+
+    def __init__(self, name: str, rate_per_minute: int, burst: int):
+        self.name = name
+        self.rate = max(1, rate_per_minute) / 60.0  # tokens per second
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()  # FIFO: waiters are served in arrival order
+
+        # Metrics
+        self._waiting = 0
+        self._acquired = 0
+        self._timeouts = 0
+        self._pauses = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, deadline: Optional[float] = None) -> float:
+        """
+        Take one token, waiting in line if the bucket is empty.
+        deadline is a time.monotonic() value; raises RateLimitTimeout if it can't be met.
+        Returns the seconds spent waiting.
+        """
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            async with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+
+                delay = max(0.0, self._paused_until - now)
+                if self._tokens < 1:
+                    delay = max(delay, (1 - self._tokens) / self.rate)
+
+                if delay > 0:
+                    if deadline is not None and now + delay > deadline:
+                        self._timeouts += 1
+                        raise RateLimitTimeout(f"{self.name} rate limit wait of {delay:.1f}s exceeds deadline")
+                    await asyncio.sleep(delay)
+                    self._refill(time.monotonic())
+
+                self._tokens -= 1
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - started
+        self._acquired += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        return waited
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for a while (e.g. after a 429 with Retry-After)"""
+        self._pauses += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill(time.monotonic())
+        return {
+            'tokens': round(self._tokens, 2),
+            'capacity': self.capacity,
+            'occupancy': round(1 - self._tokens / self.capacity, 3),
+            'waiting': self._waiting,
+            'acquired': self._acquired,
+            'timeouts': self._timeouts,
+            'pauses': self._pauses,
+            'avg_wait_ms': round(self._total_wait / self._acquired * 1000, 2) if self._acquired else 0.0,
+            'max_wait_ms': round(self._max_wait * 1000, 2),
+        }
+
+
+class StoreRateLimiters:
+    """One bucket per store, looked up from the request host"""
+
+    # Host suffix -> store name
+    STORE_HOSTS = {
+        'steampowered.com': 'steam',
+        'epicgames.com': 'epic',
+    }
+
+    def __init__(self):
+        self.buckets: Dict[str, TokenBucket] = {
+            'steam': TokenBucket('steam', settings.steam_rate_limit, settings.rate_limit_burst),
+            'epic': TokenBucket('epic', settings.epic_rate_limit, settings.rate_limit_burst),
+        }
+
+    def for_url(self, url: str) -> Optional[TokenBucket]:
+        """The bucket for a store URL, or None for hosts we don't limit"""
+        host = urlsplit(url).hostname or ''
+        for suffix, store in self.STORE_HOSTS.items():
+            if host == suffix or host.endswith('.' + suffix):
+                return self.buckets[store]
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {store: bucket.stats() for store, bucket in self.buckets.items()}
+
+
+rate_limiters = StoreRateLimiters()
@@ -0,0 +1,53 @@
+"""
+In-flight request coalescing (singleflight)
+Concurrent calls with the same key share one execution instead of repeating the work
+"""
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; later callers await the first one's result"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        # Metrics
+        self._leaders = 0
+        self._followers = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return fn()'s result, sharing it with every concurrent caller using the same key.
+        The work runs as its own task and callers await it through asyncio.shield, so a
+        caller that is cancelled (e.g. the client disconnected) leaves the others untouched.
+        """
+        task = self._inflight.get(key)
+
+        if task is None:
+            self._leaders += 1
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self._followers += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so an unawaited failure (all callers gone) isn't logged as lost
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"{self.name} call for {key} failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'inflight': len(self._inflight),
+            'leaders': self._leaders,
+            'coalesced': self._followers,
+        }
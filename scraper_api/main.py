@@ -4,18 +4,30 @@ FastAPI backend for scraping Steam and Epic Games prices
 Free tier deployment: Render.com / Railway.app / Fly.io
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 import asyncio
+import json
 import logging
-from datetime import datetime
-import uvicorn
-import requests
+import time
+from datetime import datetime, timezone
 
 from services.supabase_service import SupabaseService
+from services.price_history_buffer import create_price_history_buffer
+from services.notification_evaluator import NotificationEvaluator
+from services.price_service import fetch_steam_prices, fetch_epic_prices, remember_scraped_prices, parse_scraped_at
+from services.price_resolver import resolve_missing_prices
+from price_refresher import PriceRefreshScheduler
+from core import metrics
 from core.config import settings
+from core.profiling import ProfilingMiddleware, load_report, loop_lag_monitor, profile_requested
+from core.http_client import http_client
+from core.cache import search_cache, price_cache
+from core.singleflight import SingleFlight
+from services.steam_app_index import steam_app_index
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -37,13 +49,28 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Per-route request latency for /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Profile single requests that carry DEBUG_PROFILE_KEY (X-Debug-Profile header or ?debug_profile=)
+app.add_middleware(ProfilingMiddleware)
+
 # Initialize services
 supabase_service = SupabaseService()
+price_history_buffer = create_price_history_buffer(supabase_service)
+price_refresher = PriceRefreshScheduler(supabase_service, price_history_buffer)
+search_flight = SingleFlight('search')
+
+# Startup checks run in the background; /ready reports them while /health only means "alive"
+startup_checks: Dict[str, str] = {}
+startup_task: Optional[asyncio.Task] = None
+started_at = time.perf_counter()
 
 # Pydantic models
 class SearchRequest(BaseModel):
     query: str
     user_id: Optional[str] = None
+    allow_partial: bool = True  # Return whatever finished if a store times out
 
 class GameResult(BaseModel):
     id: str
@@ -60,15 +87,32 @@ class SearchResponse(BaseModel):
     results: List[GameResult]
     search_time: float
     ai_enabled: bool
+    partial: bool = False
+    timed_out_stores: List[str] = []
+    cache_hit: bool = False
+    cache_age: Optional[float] = None  # seconds since the cached results were produced
+    from_catalog: bool = False  # answered from the local catalog index without scraping
 
 class RefreshWishlistRequest(BaseModel):
     user_id: str
     game_ids: List[str]
 
+class GameRefreshTiming(BaseModel):
+    game_id: str
+    status: str  # 'refreshed', 'not_found' or 'failed'
+    total_ms: float
+    stages: Dict[str, float] = {}  # milliseconds per per-game stage (load_game)
+    error: Optional[str] = None
+
 class RefreshWishlistResponse(BaseModel):
     refreshed_games: int
     notifications_created: int
     ai_insights_generated: int
+    steam_batch_ms: float = 0.0
+    epic_batch_ms: float = 0.0
+    history_write_ms: float = 0.0
+    notifications_ms: float = 0.0
+    timings: List[GameRefreshTiming] = []
 
 class AddToWishlistRequest(BaseModel):
     user_id: str
@@ -76,44 +120,70 @@ class AddToWishlistRequest(BaseModel):
     target_price: Optional[float] = None
 
 async def search_steam_games(query: str) -> List[Dict[str, Any]]:
-    """Search Steam games using Playwright scraper with requests fallback"""
-    try:
-        from scrapers.steam_scraper import SteamScraper
+    """Search Steam games using Playwright scraper with requests fallback (raises if both fail)"""
+    from scrapers.steam_scraper import SteamScraper
 
+    try:
         async with SteamScraper() as scraper:
             games = await scraper.search_games(query)
 
         return games
     except Exception as e:
         logger.error(f"Steam search failed: {e}")
+        metrics.store_errors.labels('steam', 'search').inc()
         # Use requests fallback
         try:
-            scraper = SteamScraper()
-            scraper.use_playwright = True  # Enable Playwright for Render deployment
-            return scraper.requests_fallback_search(query)
+            return await SteamScraper().requests_fallback_search(query)
         except Exception as fallback_e:
             logger.error(f"Steam fallback search also failed: {fallback_e}")
-            return []
+            raise
 
 async def search_epic_games(query: str) -> List[Dict[str, Any]]:
-    """Search Epic Games using Playwright scraper with requests fallback"""
-    try:
-        from scrapers.epic_scraper import EpicScraper
+    """Search Epic Games using Playwright scraper with requests fallback (raises if both fail)"""
+    from scrapers.epic_scraper import EpicScraper
 
+    try:
         async with EpicScraper() as scraper:
             games = await scraper.search_games(query)
 
         return games
     except Exception as e:
         logger.error(f"Epic search failed: {e}")
+        metrics.store_errors.labels('epic', 'search').inc()
         # Use requests fallback
         try:
-            scraper = EpicScraper()
-            scraper.use_playwright = True  # Enable Playwright for Render deployment
-            return scraper.requests_fallback_search(query)
+            return await EpicScraper().requests_fallback_search(query)
         except Exception as fallback_e:
             logger.error(f"Epic fallback search also failed: {fallback_e}")
-            return []
+            raise
+
+async def run_store_search(store: str, search_fn, query: str) -> Dict[str, Any]:
+    """Run a single store search bounded by the per-store timeout"""
+    try:
+        with metrics.stage_seconds.labels(f"{store}_search").time():
+            results = await asyncio.wait_for(search_fn(query), timeout=settings.store_search_timeout)
+        return {'store': store, 'results': results, 'timed_out': False, 'failed': False}
+    except asyncio.TimeoutError:
+        logger.warning(f"{store} search timed out after {settings.store_search_timeout}s for: {query}")
+        metrics.store_errors.labels(store, 'timeout').inc()
+        return {'store': store, 'results': [], 'timed_out': True, 'failed': False}
+    except Exception:
+        # Already logged and counted by the store search
+        return {'store': store, 'results': [], 'timed_out': False, 'failed': True}
+
+async def search_all_stores(query: str) -> Dict[str, Any]:
+    """Search Steam and Epic concurrently and fan the results in"""
+    steam, epic = await asyncio.gather(
+        run_store_search('steam', search_steam_games, query),
+        run_store_search('epic', search_epic_games, query),
+    )
+
+    return {
+        'steam': steam['results'],
+        'epic': epic['results'],
+        'timed_out_stores': [r['store'] for r in (steam, epic) if r['timed_out']],
+        'failed_stores': [r['store'] for r in (steam, epic) if r['failed']]
+    }
 
 @app.get("/health")
 async def health_check():
@@ -124,89 +194,341 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the database is reachable (the browser launches on first use)"""
+    from scrapers.browser_pool import browser_pool
+
+    ready = startup_checks.get('supabase') == 'ok'
+    body = {
+        "status": "ready" if ready else "starting",
+        "checks": {**startup_checks, "browser": "started" if browser_pool.stats()['started'] else
+                   "lazy" if browser_pool.available else "unavailable"},
+        "uptime": round(time.perf_counter() - started_at, 3),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+async def merge_store_results(steam_results: List[Dict[str, Any]],
+                              epic_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Match both stores' hits into stored games ({'game': ..., 'prices': ...})"""
+    remember_scraped_prices(steam_results, epic_results)
+    with metrics.stage_seconds.labels('match_merge').time():
+        return await supabase_service.match_and_merge_results(steam_results, epic_results)
+
+def build_game_results(merged_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convert merged games to GameResult payloads"""
+    results = []
+    for game_data in merged_results:
+        game = game_data['game']
+        prices = game_data['prices']
+
+        # AI insight generation removed - now handled in Flutter app
+        ai_insight = None
+
+        results.append(GameResult(
+            id=game['id'],
+            title=game['title'],
+            normalized_title=game['normalized_title'],
+            steam_app_id=game.get('steam_app_id'),
+            epic_slug=game.get('epic_slug'),
+            description=game.get('description'),
+            image_url=game.get('image_url'),
+            prices=prices,
+            ai_insight=ai_insight
+        ).model_dump())
+
+    return results
+
+async def run_search_pipeline(query: str) -> Dict[str, Any]:
+    """Scrape both stores, merge, backfill prices and build the result payload"""
+    # Search both stores concurrently, each bounded by its own timeout
+    store_results = await search_all_stores(query)
+
+    merged_results = await merge_store_results(store_results['steam'], store_results['epic'])
+    await resolve_missing_prices(merged_results)
+
+    return {
+        'results': build_game_results(merged_results),
+        'timed_out_stores': store_results['timed_out_stores'],
+        'failed_stores': store_results['failed_stores']
+    }
+
+def cacheable(payload: Dict[str, Any]) -> bool:
+    """
+    Only complete answers are cached: partial results would keep the slow store out,
+    and empty results or failed stores are usually an outage, not a real "no results"
+    """
+    return bool(payload['results']) and not payload['timed_out_stores'] and not payload.get('failed_stores')
+
+def catalog_price(store: str, game: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """A game's price for one store from the in-memory price cache"""
+    if store == 'steam':
+        cached = price_cache.peek('steam', str(game['steam_app_id']))
+        if cached is None:
+            return None
+        return {**cached, 'url': f"https://store.steampowered.com/app/{game['steam_app_id']}"}
+
+    cached = price_cache.peek('epic', game['epic_slug'])
+    if cached is None:
+        return None
+    return {'url': f"https://store.epicgames.com/p/{game['epic_slug']}", **cached}
+
+async def catalog_search(query: str) -> Optional[Dict[str, Any]]:
+    """
+    Answer a search from the catalog index when every matching game has fresh prices.
+    Returns None (scrape the stores) if nothing matches or any price is missing/stale.
+    """
+    if not settings.catalog_index_enabled or not supabase_service.catalog.loaded:
+        return None
+
+    with metrics.stage_seconds.labels('catalog_search').time():
+        payload = await answer_from_catalog(query)
+    metrics.cache_requests.labels('catalog', 'miss' if payload is None else 'hit').inc()
+    return payload
+
+async def answer_from_catalog(query: str) -> Optional[Dict[str, Any]]:
+    """catalog_search without the enabled check and timing"""
+    games = supabase_service.search_catalog(query, settings.catalog_max_results)
+    if not games:
+        return None
+
+    store_keys = {'steam': 'steam_app_id', 'epic': 'epic_slug'}
+    prices_by_game: Dict[str, Dict[str, Any]] = {}
+    missing: Dict[str, List[str]] = {}
+
+    for game in games:
+        prices = prices_by_game.setdefault(str(game['id']), {})
+        for store, key in store_keys.items():
+            if not game.get(key):
+                continue
+            price = catalog_price(store, game)
+            if price is not None and price.get('price') is not None:
+                prices[store] = price
+            else:
+                missing.setdefault(str(game['id']), []).append(store)
+
+    if missing:
+        # Fall back to the last stored prices, as long as they are recent enough
+        try:
+            latest = await supabase_service.get_latest_prices(list(missing))
+        except Exception as e:
+            logger.warning(f"Catalog price lookup failed, scraping instead: {e}")
+            return None
+        now = datetime.now(timezone.utc)
+        max_age = settings.catalog_price_max_age_minutes * 60
+        games_by_id = {str(game['id']): game for game in games}
+
+        for game_id, stores in missing.items():
+            for store in stores:
+                row = latest.get((game_id, store))
+                scraped_at = parse_scraped_at(row.get('scraped_at')) if row else None
+                if row is None or row.get('price') is None or scraped_at is None \
+                        or (now - scraped_at).total_seconds() > max_age:
+                    return None
+                game = games_by_id[game_id]
+                prices_by_game[game_id][store] = {
+                    'price': row['price'],
+                    'discount_percent': 0,
+                    'is_free': row['price'] == 0,
+                    'url': f"https://store.steampowered.com/app/{game['steam_app_id']}" if store == 'steam'
+                           else f"https://store.epicgames.com/p/{game['epic_slug']}",
+                    'scraped_at': row['scraped_at']
+                }
+
+    results = [
+        GameResult(
+            id=str(game['id']),
+            title=game['title'],
+            normalized_title=game['normalized_title'],
+            steam_app_id=game.get('steam_app_id'),
+            epic_slug=game.get('epic_slug'),
+            description=game.get('description'),
+            image_url=game.get('image_url'),
+            prices=prices_by_game[str(game['id'])]
+        ).model_dump()
+        for game in games
+    ]
+    return {'results': results, 'timed_out_stores': []}
+
+async def search_and_cache(query: str) -> Dict[str, Any]:
+    """Run the search pipeline once for every concurrent caller of the same query"""
+    async def run():
+        payload = await run_search_pipeline(query)
+        if cacheable(payload):
+            await search_cache.set('all', query, payload)
+        return payload
+
+    return await search_flight.do(search_cache.make_key('all', query), run)
+
+def revalidate_search(query: str):
+    """Refresh a stale cached search in the background, sharing any scrape already running"""
+    async def reload():
+        fresh = await search_flight.do(
+            search_cache.make_key('all', query),
+            lambda: run_search_pipeline(query)
+        )
+        return fresh, cacheable(fresh)
+    search_cache.refresh_in_background('all', query, reload)
+
+def ndjson_event(event: str, **fields) -> bytes:
+    """One line of the streaming search response"""
+    return (json.dumps({'event': event, **fields}, default=str) + '\n').encode()
+
+async def stream_search_events(query: str) -> AsyncIterator[bytes]:
+    """
+    Search events, in order:
+    - 'store': one store's raw hits, as soon as that store answers (Steam/Epic, whichever is first)
+    - 'merged': matched games with the prices known so far
+    - 'updated': games whose missing prices were backfilled (only if any)
+    - 'done': timings, including time_to_first_result (None if nothing was found)
+    Cached and catalog answers are a single 'merged' event followed by 'done'.
+    """
+    started = time.perf_counter()
+    first_result: Optional[float] = None
+
+    def elapsed() -> float:
+        return round(time.perf_counter() - started, 3)
+
+    def done(timed_out_stores: List[str], **fields) -> bytes:
+        return ndjson_event(
+            'done',
+            search_time=elapsed(),
+            time_to_first_result=first_result,
+            partial=bool(timed_out_stores),
+            timed_out_stores=timed_out_stores,
+            **fields
+        )
+
+    cached = await search_cache.get('all', query)
+    metrics.cache_requests.labels('search', 'miss' if cached is None else 'hit').inc()
+    payload = cached.value if cached is not None else await catalog_search(query)
+    if payload is not None:
+        if cached is not None and search_cache.is_stale(cached):
+            revalidate_search(query)
+        first_result = elapsed() if payload['results'] else None
+        yield ndjson_event('merged', results=payload['results'], elapsed=elapsed())
+        metrics.stage_seconds.labels('search_total').observe(time.perf_counter() - started)
+        yield done(payload['timed_out_stores'], cache_hit=cached is not None, from_catalog=cached is None)
+        return
+
+    tasks = [
+        asyncio.create_task(run_store_search('steam', search_steam_games, query)),
+        asyncio.create_task(run_store_search('epic', search_epic_games, query)),
+    ]
+    try:
+        store_results = {}
+        for next_store in asyncio.as_completed(tasks):
+            result = await next_store
+            store_results[result['store']] = result
+            if result['results'] and first_result is None:
+                first_result = elapsed()
+            yield ndjson_event(
+                'store',
+                store=result['store'],
+                results=result['results'],
+                timed_out=result['timed_out'],
+                elapsed=elapsed()
+            )
+    finally:
+        # The client went away mid-stream: stop scraping for it
+        for task in tasks:
+            task.cancel()
+
+    timed_out_stores = [store for store in ('steam', 'epic') if store_results[store]['timed_out']]
+    failed_stores = [store for store in ('steam', 'epic') if store_results[store]['failed']]
+    try:
+        merged_results = await merge_store_results(store_results['steam']['results'], store_results['epic']['results'])
+        yield ndjson_event('merged', results=build_game_results(merged_results), elapsed=elapsed())
+
+        updated = await resolve_missing_prices(merged_results)
+        if updated:
+            yield ndjson_event('updated', results=build_game_results(updated), elapsed=elapsed())
+    except Exception as e:
+        logger.error(f"Streaming search failed: {e}")
+        yield ndjson_event('error', detail=f"Search failed: {str(e)}", elapsed=elapsed())
+        return
+
+    # Same caching rule as /api/search
+    payload = {
+        'results': build_game_results(merged_results),
+        'timed_out_stores': timed_out_stores,
+        'failed_stores': failed_stores
+    }
+    if cacheable(payload):
+        await search_cache.set('all', query, payload)
+
+    metrics.stage_seconds.labels('search_total').observe(time.perf_counter() - started)
+    yield done(timed_out_stores, cache_hit=False, from_catalog=False)
+
+@app.get("/api/stats")
+async def service_stats():
+    """Internal counters for caches, write buffers and store rate limiters"""
+    from scrapers.browser_pool import browser_pool
+
+    return {
+        "search_cache": search_cache.stats(),
+        "search_coalescing": search_flight.stats(),
+        "catalog": supabase_service.catalog.stats(),
+        "steam_app_index": steam_app_index.stats(),
+        "browser": browser_pool.stats(),
+        "http": http_client.stats(),
+        "event_loop": loop_lag_monitor.stats(),
+        "price_history_buffer": price_history_buffer.stats(),
+        "price_refresher": price_refresher.last_run,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Latency histograms and counters in the Prometheus text format"""
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/debug/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request):
+    """A stored request profile; needs the same debug key as the profiled request"""
+    report = load_report(profile_id) if profile_requested(request.scope) else None
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(report)
+
 @app.post("/api/search", response_model=SearchResponse)
 async def search_games(request: SearchRequest, background_tasks: BackgroundTasks):
     """
     Search for games on Steam and Epic Games simultaneously
     Returns unified results with price comparison
     """
-    start_time = datetime.utcnow()
+    started = time.perf_counter()
 
     try:
         logger.info(f"Searching for: {request.query}")
 
-        # Search both stores using simple HTTP requests
-        steam_results = await search_steam_games(request.query)
-        epic_results = await search_epic_games(request.query)
+        cache_hit = False
+        cache_age = None
+        from_catalog = False
+        cached = await search_cache.get('all', request.query)
+        metrics.cache_requests.labels('search', 'miss' if cached is None else 'hit').inc()
 
-        # Match and merge results
-        merged_results = await supabase_service.match_and_merge_results(
-            steam_results, epic_results
-        )
+        if cached is not None:
+            cache_hit = True
+            cache_age = cached.age
+            payload = cached.value
 
-        # Ensure both prices are fetched for each game
-        for game_data in merged_results:
-            game = game_data['game']
-            prices = game_data['prices']
-
-            # If game has steam_app_id but no steam price, try to get it
-            if game.get('steam_app_id') and not prices.get('steam'):
-                try:
-                    steam_url = f"https://store.steampowered.com/api/appdetails?appids={game['steam_app_id']}"
-                    response = requests.get(steam_url, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data.get(str(game['steam_app_id']), {}).get('success'):
-                            price_info = data[str(game['steam_app_id'])].get('data', {}).get('price_overview', {})
-                            steam_price = price_info.get('final', 0) / 100 if price_info else None
-                            if steam_price is not None:
-                                prices['steam'] = {
-                                    'price': steam_price,
-                                    'url': f"https://store.steampowered.com/app/{game['steam_app_id']}",
-                                    'is_free': steam_price == 0,
-                                    'discount_percent': price_info.get('discount_percent', 0)
-                                }
-                except Exception as e:
-                    logger.warning(f"Failed to get Steam price for {game['steam_app_id']}: {e}")
-
-            # If game has epic_slug but no epic price, try to get it
-            if game.get('epic_slug') and not prices.get('epic'):
-                try:
-                    from scrapers.epic_scraper import EpicScraper
-                    async with EpicScraper() as scraper:
-                        epic_games = await scraper.search_games(game['title'])
-                        if epic_games:
-                            epic_price = epic_games[0].get('price')
-                            if epic_price is not None:
-                                prices['epic'] = {
-                                    'price': epic_price,
-                                    'url': epic_games[0].get('url'),
-                                    'is_free': epic_price == 0,
-                                    'discount_percent': 0
-                                }
-                except Exception as e:
-                    logger.warning(f"Failed to get Epic price for {game['epic_slug']}: {e}")
-
-        # Convert to response format
-        results = []
-        for game_data in merged_results:
-            game = game_data['game']
-            prices = game_data['prices']
-
-            # AI insight generation removed - now handled in Flutter app
-            ai_insight = None
-
-            results.append(GameResult(
-                id=game['id'],
-                title=game['title'],
-                normalized_title=game['normalized_title'],
-                steam_app_id=game.get('steam_app_id'),
-                epic_slug=game.get('epic_slug'),
-                description=game.get('description'),
-                image_url=game.get('image_url'),
-                prices=prices,
-                ai_insight=ai_insight
-            ))
+            # Serve the hot query instantly and revalidate it in the background
+            if search_cache.is_stale(cached):
+                revalidate_search(request.query)
+        else:
+            # Known games with fresh prices are answered from the catalog index;
+            # identical concurrent searches for anything else share one scrape + merge
+            payload = await catalog_search(request.query)
+            from_catalog = payload is not None
+            if payload is None:
+                payload = await search_and_cache(request.query)
+            if payload['timed_out_stores'] and not request.allow_partial:
+                raise HTTPException(
+                    status_code=504,
+                    detail=f"Store search timed out: {', '.join(payload['timed_out_stores'])}"
+                )
 
         # Log search for AI analysis
         if request.user_id:
@@ -216,18 +538,73 @@ async def search_games(request: SearchRequest, background_tasks: BackgroundTasks
                 request.query
             )
 
-        search_time = (datetime.utcnow() - start_time).total_seconds()
+        search_time = time.perf_counter() - started
+        metrics.stage_seconds.labels('search_total').observe(search_time)
+        timed_out_stores = payload['timed_out_stores']
 
         return SearchResponse(
-            results=results,
+            results=[GameResult(**result) for result in payload['results']],
             search_time=search_time,
-            ai_enabled=False  # AI now handled in Flutter app
+            ai_enabled=False,  # AI now handled in Flutter app
+            partial=bool(timed_out_stores),
+            timed_out_stores=timed_out_stores,
+            cache_hit=cache_hit,
+            cache_age=cache_age,
+            from_catalog=from_catalog
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Search failed: {e}")
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+@app.post("/api/search/stream")
+async def search_games_stream(request: SearchRequest, background_tasks: BackgroundTasks):
+    """
+    Streaming variant of /api/search (NDJSON, one event per line)
+    Store hits are sent as each store answers, then merged and backfilled games
+    """
+    logger.info(f"Streaming search for: {request.query}")
+
+    # Log search for AI analysis
+    if request.user_id:
+        background_tasks.add_task(
+            supabase_service.log_user_search,
+            request.user_id,
+            request.query
+        )
+
+    return StreamingResponse(
+        stream_search_events(request.query),
+        media_type="application/x-ndjson",
+        # Proxies (Render, nginx) must not buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks
+    )
+
+async def load_wishlist_game(game_id: str, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    """Load one wishlist game, timing the database read"""
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            game = await supabase_service.get_game_by_id(game_id)
+            error = None
+        except Exception as e:
+            logger.error(f"Failed to load game {game_id}: {e}")
+            game, error = None, str(e)
+        return {'game': game, 'error': error, 'load_ms': (time.perf_counter() - started) * 1000}
+
+def wishlist_game_prices(game: Dict[str, Any], steam_prices: Dict[str, Any],
+                         epic_prices: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """One game's current Steam and Epic prices from the batched lookups"""
+    steam_entry = steam_prices.get(str(game['steam_app_id'])) if game.get('steam_app_id') else None
+    epic_entry = epic_prices.get(game['epic_slug']) if game.get('epic_slug') else None
+    return {
+        'steam': steam_entry['price'] if steam_entry else None,
+        'epic': epic_entry['price'] if epic_entry else None
+    }
+
 @app.post("/api/refresh-wishlist", response_model=RefreshWishlistResponse)
 async def refresh_wishlist(request: RefreshWishlistRequest, background_tasks: BackgroundTasks):
     """
@@ -240,77 +617,111 @@ async def refresh_wishlist(request: RefreshWishlistRequest, background_tasks: Ba
         refreshed_count = 0
         notifications_count = 0
         ai_insights_count = 0
-
-        for game_id in request.game_ids:
+        semaphore = asyncio.Semaphore(max(1, settings.max_concurrent_requests))
+        game_ids = list(dict.fromkeys(request.game_ids))
+
+        # Load every game first so Steam and Epic prices can each be fetched in one batch
+        loaded = await asyncio.gather(*(load_wishlist_game(game_id, semaphore) for game_id in game_ids))
+
+        games = {}
+        timings = {}
+        for game_id, result in zip(game_ids, loaded):
+            timings[game_id] = GameRefreshTiming(
+                game_id=game_id,
+                status='not_found' if result['error'] is None else 'failed',
+                total_ms=result['load_ms'],
+                stages={'load_game': result['load_ms']},
+                error=result['error']
+            )
+            if result['game']:
+                games[game_id] = result['game']
+
+        steam_prices = {}
+        steam_batch_ms = 0.0
+        steam_app_ids = [game['steam_app_id'] for game in games.values() if game.get('steam_app_id')]
+        if steam_app_ids:
+            started = time.perf_counter()
             try:
-                # Get game details from database
-                game = await supabase_service.get_game_by_id(game_id)
-                if not game:
-                    continue
-
-                # Scrape current prices using simple HTTP
-                steam_price = None
-                epic_price = None
-
-                if game.get('steam_app_id'):
-                    # Get Steam price
-                    try:
-                        steam_url = f"https://store.steampowered.com/api/appdetails?appids={game['steam_app_id']}"
-                        response = requests.get(steam_url, timeout=10)
-                        if response.status_code == 200:
-                            data = response.json()
-                            if data.get(str(game['steam_app_id']), {}).get('success'):
-                                price_info = data[str(game['steam_app_id'])].get('data', {}).get('price_overview', {})
-                                steam_price = price_info.get('final', 0) / 100 if price_info else None
-                    except Exception as e:
-                        logger.warning(f"Failed to get Steam price for {game['steam_app_id']}: {e}")
-
-                if game.get('epic_slug'):
-                    # Get Epic price using fallback scraper
-                    try:
-                        from scrapers.epic_scraper import EpicScraper
-                        async with EpicScraper() as scraper:
-                            epic_games = await scraper.search_games(game['title'])
-                            if epic_games:
-                                epic_price = epic_games[0].get('price')
-                    except Exception as e:
-                        logger.warning(f"Failed to get Epic price for {game['epic_slug']}: {e}")
-
-                # Also try to get Steam price if Epic failed
-                if steam_price is None and game.get('steam_app_id'):
-                    try:
-                        steam_url = f"https://store.steampowered.com/api/appdetails?appids={game['steam_app_id']}"
-                        response = requests.get(steam_url, timeout=10)
-                        if response.status_code == 200:
-                            data = response.json()
-                            if data.get(str(game['steam_app_id']), {}).get('success'):
-                                price_info = data[str(game['steam_app_id'])].get('data', {}).get('price_overview', {})
-                                steam_price = price_info.get('final', 0) / 100 if price_info else None
-                    except Exception as e:
-                        logger.warning(f"Failed to get Steam price for {game['steam_app_id']}: {e}")
-
-                # Save new price history
-                await supabase_service.save_price_history(game_id, steam_price, epic_price)
-
-                # Check for notifications (price drops, target reached)
-                notifications_created = await supabase_service.check_and_create_notifications(
-                    request.user_id, game_id, steam_price, epic_price
-                )
-                notifications_count += notifications_created
+                steam_prices = await fetch_steam_prices(steam_app_ids)
+            except Exception as e:
+                logger.warning(f"Failed to get Steam prices for wishlist: {e}")
+            steam_batch_ms = (time.perf_counter() - started) * 1000
+
+        # Epic: every slug in one batched catalog lookup (shared across users through the price cache)
+        epic_prices = {}
+        epic_batch_ms = 0.0
+        epic_games = {game['epic_slug']: game.get('title') for game in games.values() if game.get('epic_slug')}
+        if epic_games:
+            started = time.perf_counter()
+            try:
+                epic_prices = await fetch_epic_prices(epic_games)
+            except Exception as e:
+                logger.warning(f"Failed to get Epic prices for wishlist: {e}")
+            epic_batch_ms = (time.perf_counter() - started) * 1000
+
+        # Current prices for every game from the two batched lookups
+        game_prices = {
+            game_id: wishlist_game_prices(game, steam_prices, epic_prices) for game_id, game in games.items()
+        }
+
+        # Evaluate notifications for the whole wishlist before the new prices are stored,
+        # so each store's last saved price is the one we compare against
+        evaluator = NotificationEvaluator(supabase_service)
+        notifications = []
+        notifications_ms = 0.0
+        if game_prices:
+            started = time.perf_counter()
+            try:
+                notifications = await evaluator.evaluate({request.user_id: game_prices})
+            except Exception as e:
+                logger.error(f"Error checking notifications: {e}")
+            notifications_ms = (time.perf_counter() - started) * 1000
 
-                # AI insights generation moved to Flutter app, but can be saved to Supabase for sync
-                # ai_insights_count remains 0 as AI processing moved to client-side
+        # Save all new price history with one multi-row insert
+        history_rows = []
+        for game_id, prices in game_prices.items():
+            history_rows.extend(supabase_service.price_history_rows(game_id, prices['steam'], prices['epic']))
 
+        history_write_ms = 0.0
+        if history_rows:
+            started = time.perf_counter()
+            try:
+                await supabase_service.save_price_history_bulk(history_rows)
+            except Exception as e:
+                logger.error(f"Failed to save price history for wishlist: {e}")
+                for game_id in game_prices:
+                    timings[game_id].status = 'failed'
+                    timings[game_id].error = f"Saving price history failed: {e}"
+                game_prices = {}
+                notifications = []
+            history_write_ms = (time.perf_counter() - started) * 1000
+
+        # Create every notification (price drops, target reached) in one insert
+        if notifications:
+            started = time.perf_counter()
+            try:
+                notifications_count = await evaluator.notify(notifications)
+            except Exception as e:
+                logger.error(f"Failed to create notifications: {e}")
+            notifications_ms += (time.perf_counter() - started) * 1000
+
+        for game_id in game_prices:
+            if timings[game_id].status != 'failed':
+                timings[game_id].status = 'refreshed'
                 refreshed_count += 1
 
-            except Exception as e:
-                logger.error(f"Failed to refresh game {game_id}: {e}")
-                continue
+        # AI insights generation moved to Flutter app, but can be saved to Supabase for sync
+        # ai_insights_count remains 0 as AI processing moved to client-side
 
         return RefreshWishlistResponse(
             refreshed_games=refreshed_count,
             notifications_created=notifications_count,
-            ai_insights_generated=ai_insights_count
+            ai_insights_generated=ai_insights_count,
+            steam_batch_ms=steam_batch_ms,
+            epic_batch_ms=epic_batch_ms,
+            history_write_ms=history_write_ms,
+            notifications_ms=notifications_ms,
+            timings=list(timings.values())
         )
 
     except Exception as e:
@@ -330,25 +741,8 @@ async def add_to_wishlist(request: AddToWishlistRequest):
         if not game:
             raise HTTPException(status_code=404, detail="Game not found")
 
-        # Check if already in wishlist
-        existing = supabase_service.client.table('wishlist').select('*').eq('user_id', request.user_id).eq('game_id', request.game_id).execute()
-
-        if existing.data:
-            # Update target price if provided
-            if request.target_price is not None:
-                supabase_service.client.table('wishlist').update({
-                    'target_price': request.target_price
-                }).eq('user_id', request.user_id).eq('game_id', request.game_id).execute()
-        else:
-            # Add to wishlist
-            wishlist_data = {
-                'user_id': request.user_id,
-                'game_id': request.game_id
-            }
-            if request.target_price is not None:
-                wishlist_data['target_price'] = request.target_price
-
-            supabase_service.client.table('wishlist').insert(wishlist_data).execute()
+        # Add to wishlist, or update the target price if it's already there
+        await supabase_service.add_to_wishlist(request.user_id, request.game_id, request.target_price)
 
         return {"message": "Game added to wishlist successfully"}
 
@@ -362,27 +756,99 @@ async def add_to_wishlist(request: AddToWishlistRequest):
 # La funcionalidad de IA se ha migrado completamente a la aplicación Flutter
 # Este endpoint ya no es necesario y puede ser removido en futuras versiones
 
+async def load_catalog_index():
+    try:
+        await supabase_service.load_catalog()
+        startup_checks['catalog'] = 'ok'
+    except Exception as e:
+        startup_checks['catalog'] = f"failed: {e}"
+        logger.error(f"❌ Catalog index load failed, searches will scrape: {e}")
+
+async def connect_supabase(max_delay: float = 60.0):
+    """Warm up Supabase, retrying with backoff until it answers"""
+    delay = 2.0
+    while True:
+        try:
+            await supabase_service.warm_up()
+            startup_checks['supabase'] = 'ok'
+            logger.info("✅ Supabase connection successful")
+            return
+        except Exception as e:
+            startup_checks['supabase'] = f"failed: {e}"
+            logger.error(f"❌ Supabase connection failed, retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+async def run_startup_checks():
+    """Everything that used to block startup, run after the server is already answering"""
+    startup_checks.update({
+        'supabase': 'pending',
+        'catalog': 'pending' if settings.catalog_index_enabled else 'disabled',
+        'steam_app_index': 'pending' if settings.steam_app_index_enabled else 'disabled',
+    })
+
+    # Offline Steam name -> appid index, rebuilt from the app list on a schedule
+    if settings.steam_app_index_enabled:
+        try:
+            await steam_app_index.start()
+            startup_checks['steam_app_index'] = 'ok'
+        except Exception as e:
+            startup_checks['steam_app_index'] = f"failed: {e}"
+            logger.warning(f"⚠️ Steam app index unavailable, using storesearch: {e}")
+
+    # Test Supabase connection and warm up its worker threads
+    await connect_supabase()
+
+    # Build the catalog index; searches scrape until it is loaded
+    if settings.catalog_index_enabled:
+        await load_catalog_index()
+
+    # Keep wishlisted prices fresh in the background
+    if settings.price_refresh_enabled:
+        await price_refresher.start()
+
+    logger.info(f"✅ Startup checks finished in {time.perf_counter() - started_at:.2f}s")
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize services on startup"""
+    """Initialize services on startup; slow checks continue in the background"""
+    global startup_task
     logger.info("🚀 Starting GamePrice Scraper API")
 
-    # Test Supabase connection
-    try:
-        await supabase_service.test_connection()
-        logger.info("✅ Supabase connection successful")
-    except Exception as e:
-        logger.error(f"❌ Supabase connection failed: {e}")
-        raise
+    # Log stack traces of anything that blocks the event loop
+    if settings.loop_lag_monitor_enabled:
+        loop_lag_monitor.start()
+
+    # Open the shared HTTP client pool used by every store request
+    await http_client.start()
+
+    # Background writer for price rows produced outside request handlers
+    await price_history_buffer.start()
+
+    # The shared browser is launched by the first scraper that needs a page,
+    # so Playwright is never imported on hosts/requests that don't use it
+    startup_task = asyncio.create_task(run_startup_checks())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("🛑 Shutting down GamePrice Scraper API")
+    if startup_task and not startup_task.done():
+        startup_task.cancel()
+    loop_lag_monitor.stop()
+    await price_refresher.stop()
+    await steam_app_index.close()
+    from scrapers.browser_pool import browser_pool
+    await browser_pool.close()
+    await http_client.close()
+    await price_history_buffer.close()
+    supabase_service.close()
 
 if __name__ == "__main__":
     # For local development only
     import os
+    import uvicorn
+
     port = int(os.environ.get("PORT", 8000))
 
     uvicorn.run(
@@ -0,0 +1,214 @@
+"""
+🕒 Background price refresher
+Keeps every wishlisted game's prices fresh on a schedule, most stale / most watched first.
+Runs inside the API (PRICE_REFRESH_ENABLED=true) or as its own worker: python price_refresher.py
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import random
+import time
+
+from core.config import settings
+from services.notification_evaluator import NotificationEvaluator
+from services.price_service import fetch_steam_prices, fetch_epic_prices, parse_scraped_at
+
+logger = logging.getLogger(__name__)
+
+
+class PriceRefreshScheduler:
+    """Finds wishlisted games that need fresh prices and refreshes them in bulk"""
+
+    def __init__(self, supabase_service, history_buffer):
+        self.supabase_service = supabase_service
+        self.history_buffer = history_buffer
+        self.evaluator = NotificationEvaluator(supabase_service)
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    async def start(self):
+        """Run the refresh loop in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+            logger.info("🕒 Price refresher started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_forever(self):
+        interval = settings.price_refresh_interval_minutes * 60
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Price refresh cycle failed: {e}")
+            # Jitter keeps several workers from waking up in lockstep
+            await asyncio.sleep(interval + random.uniform(0, settings.price_refresh_jitter_seconds))
+
+    async def _jitter(self):
+        await asyncio.sleep(random.uniform(0, settings.price_refresh_jitter_seconds))
+
+    async def select_due_games(self) -> List[Dict[str, Any]]:
+        """Wishlisted games ordered by priority (staleness weighted by watcher count)"""
+        watchers = await self.supabase_service.get_wishlist_watchers()
+
+        users_by_game: Dict[str, List[str]] = {}
+        for row in watchers:
+            users_by_game.setdefault(str(row['game_id']), []).append(str(row['user_id']))
+        if not users_by_game:
+            return []
+
+        latest = await self.supabase_service.get_latest_prices(list(users_by_game))
+        last_scraped: Dict[str, datetime] = {}
+        for (game_id, _), row in latest.items():
+            scraped_at = parse_scraped_at(row.get('scraped_at'))
+            if scraped_at and (game_id not in last_scraped or scraped_at > last_scraped[game_id]):
+                last_scraped[game_id] = scraped_at
+
+        now = datetime.now(timezone.utc)
+        min_age = settings.price_refresh_min_age_minutes * 60
+        due = []
+        for game_id, users in users_by_game.items():
+            scraped_at = last_scraped.get(game_id)
+            staleness = (now - scraped_at).total_seconds() if scraped_at else None
+            if staleness is not None and staleness < min_age:
+                continue
+            due.append({
+                'game_id': game_id,
+                'users': users,
+                'staleness': staleness,
+                # Never-priced games first, then stale games with many watchers
+                'priority': (staleness if staleness is not None else float('inf')) * (1 + len(users))
+            })
+
+        due.sort(key=lambda entry: entry['priority'], reverse=True)
+        return due[:settings.price_refresh_batch_size]
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Run one refresh cycle and return its summary"""
+        started = time.perf_counter()
+        due = await self.select_due_games()
+        if not due:
+            self.last_run = {'games': 0, 'finished_at': datetime.utcnow().isoformat()}
+            return self.last_run
+
+        games = await self.supabase_service.get_games_by_ids([entry['game_id'] for entry in due])
+        game_prices: Dict[str, Dict[str, Optional[float]]] = {
+            str(game['id']): {'steam': None, 'epic': None} for game in games
+        }
+
+        # Store requests are paced by the shared per-store rate limiter in http_client;
+        # the jitter only spreads this worker's calls out so it doesn't take whole bursts
+
+        # Steam: batched appdetails calls
+        steam_games = {str(game['steam_app_id']): str(game['id']) for game in games if game.get('steam_app_id')}
+        app_ids = list(steam_games)
+        batch_size = max(1, settings.steam_price_batch_size)
+        for start in range(0, len(app_ids), batch_size):
+            chunk = app_ids[start:start + batch_size]
+            await self._jitter()
+            try:
+                prices = await fetch_steam_prices(chunk)
+            except Exception as e:
+                logger.warning(f"Scheduled Steam price fetch failed: {e}")
+                continue
+            for app_id, entry in prices.items():
+                if entry and app_id in steam_games:
+                    game_prices[steam_games[app_id]]['steam'] = entry['price']
+
+        # Epic: batched catalog lookups for every slug
+        epic_games = {game['epic_slug']: game for game in games if game.get('epic_slug')}
+        if epic_games:
+            await self._jitter()
+            try:
+                prices = await fetch_epic_prices({slug: game.get('title') for slug, game in epic_games.items()})
+            except Exception as e:
+                logger.warning(f"Scheduled Epic price fetch failed: {e}")
+                prices = {}
+            for slug, entry in prices.items():
+                if entry and slug in epic_games:
+                    game_prices[str(epic_games[slug]['id'])]['epic'] = entry['price']
+
+        refreshed = {
+            game_id: prices for game_id, prices in game_prices.items()
+            if prices['steam'] is not None or prices['epic'] is not None
+        }
+
+        # Notifications for every watcher, evaluated before the new prices are stored
+        fresh_by_user: Dict[str, Dict[str, Dict[str, Optional[float]]]] = {}
+        for entry in due:
+            if entry['game_id'] in refreshed:
+                for user_id in entry['users']:
+                    fresh_by_user.setdefault(user_id, {})[entry['game_id']] = refreshed[entry['game_id']]
+
+        notifications = []
+        try:
+            notifications = await self.evaluator.evaluate(fresh_by_user)
+        except Exception as e:
+            logger.error(f"Scheduled notification evaluation failed: {e}")
+
+        scraped_at = datetime.utcnow().isoformat()
+        rows = []
+        for game_id, prices in refreshed.items():
+            rows.extend(self.supabase_service.price_history_rows(game_id, prices['steam'], prices['epic'], scraped_at))
+        # Write every row before notifying: unwritten rows would make the next cycle
+        # compare against the old price and send the same notifications again
+        written = await self.history_buffer.add(rows)
+        written = await self.history_buffer.flush_all() and written
+        if not written:
+            logger.error(f"Scheduled price history write failed, skipping {len(notifications)} notifications")
+            notifications = []
+
+        created = 0
+        try:
+            created = await self.evaluator.notify(notifications)
+        except Exception as e:
+            logger.error(f"Scheduled notification insert failed: {e}")
+
+        self.last_run = {
+            'games': len(due),
+            'refreshed': len(refreshed),
+            'price_rows': len(rows),
+            'history_written': written,
+            'notifications': created,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            'finished_at': datetime.utcnow().isoformat()
+        }
+        logger.info(f"🕒 Price refresh cycle: {self.last_run}")
+        return self.last_run
+
+
+async def main():
+    """Standalone worker entry point"""
+    from core.http_client import http_client
+    from services.supabase_service import SupabaseService
+    from services.price_history_buffer import create_price_history_buffer
+
+    supabase_service = SupabaseService()
+    history_buffer = create_price_history_buffer(supabase_service)
+
+    await http_client.start()
+    await supabase_service.warm_up()
+    await history_buffer.start()
+
+    scheduler = PriceRefreshScheduler(supabase_service, history_buffer)
+    try:
+        await scheduler.run_forever()
+    finally:
+        await history_buffer.close()
+        await http_client.close()
+        supabase_service.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -2,95 +2,153 @@
 Base scraper class with fallback to requests when Playwright fails
 """
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
-from playwright.async_api import async_playwright, Browser, Page, BrowserContext
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Pattern, Tuple
 import asyncio
 import logging
-import requests
-from bs4 import BeautifulSoup
+import re
+import time
 from datetime import datetime
 
+from core import metrics
+from core.rate_limiter import rate_limiters
+from core.config import settings
+from .browser_pool import browser_pool
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page, BrowserContext
+
 logger = logging.getLogger(__name__)
 
 
+def _blocklist_pattern() -> Pattern:
+    """Tracker domains and heavy static assets (images, CSS, fonts, media)"""
+    domains = '|'.join(re.escape(domain) for domain in settings.browser_blocked_domains)
+    extensions = '|'.join(re.escape(ext) for ext in settings.browser_blocked_extensions)
+    return re.compile(rf'^https?://([^/?#]*\.)?({domains})([:/?#]|$)|\.({extensions})([?#]|$)', re.IGNORECASE)
+
+
+def _outside_allowlist_pattern(domains: Tuple[str, ...]) -> Pattern:
+    """http(s) URLs whose host is not one of the allowed domains (or their subdomains)"""
+    allowed = '|'.join(re.escape(domain) for domain in domains)
+    return re.compile(rf'^https?://(?!([^/?#]*\.)?({allowed})([:/?#]|$))', re.IGNORECASE)
+
+
 class PlaywrightBaseScraper(ABC):
     """Base class for store scrapers using Playwright with requests fallback"""
 
+    # Metrics label for this scraper's store
+    STORE = ''
+
+    # Lean mode: whether the store's pages need JavaScript, and the only domains they may load from
+    NEEDS_JAVASCRIPT = True
+    ALLOWED_DOMAINS: Tuple[str, ...] = ()
+
     def __init__(self, headless: bool = True):
         self.headless = headless
-        self.browser: Optional[Browser] = None
-        self.context: Optional[BrowserContext] = None
+        self.context: Optional['BrowserContext'] = None
         self.use_playwright = True  # Enable Playwright for Render deployment
 
     async def __aenter__(self):
-        """Async context manager entry"""
-        # Always use requests fallback for Render deployment
-        logger.info("Using requests fallback for Render deployment (no Playwright)")
+        """Async context manager entry; a browser context is borrowed on first page"""
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.use_playwright:
-            await self._close_browser()
+        """Async context manager exit: return the context to the pool"""
+        if self.context:
+            context, self.context = self.context, None
+            await browser_pool.release_context(context)
 
-    async def _init_browser(self):
-        """Initialize Playwright browser"""
-        try:
-            self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(
-                headless=self.headless,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-accelerated-2d-canvas',
-                    '--no-first-run',
-                    '--no-zygote',
-                    '--single-process',
-                    '--disable-gpu'
-                ]
-            )
-            self.context = await self.browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            )
-            logger.info("✅ Browser initialized successfully")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize browser: {e}")
-            raise
+    async def create_page(self) -> 'Page':
+        """Create a new page with common settings"""
+        lean = settings.browser_lean_mode
 
-    async def _close_browser(self):
-        """Close browser and cleanup"""
-        try:
-            if self.context:
-                await self.context.close()
-            if self.browser:
-                await self.browser.close()
-            if hasattr(self, 'playwright'):
-                await self.playwright.stop()
-            logger.info("🧹 Browser cleanup completed")
-        except Exception as e:
-            logger.warning(f"Browser cleanup warning: {e}")
+        if not self.context and self.use_playwright and browser_pool.available:
+            # Borrowed lazily so scrapers that never need a browser don't hold one
+            self.context = await browser_pool.acquire_context(javascript=self.NEEDS_JAVASCRIPT or not lean)
 
-    async def create_page(self) -> Page:
-        """Create a new page with common settings"""
         if not self.context:
             raise RuntimeError("Browser context not initialized")
 
-        page = await self.context.new_page()
+        page = await browser_pool.new_page(self.context)
 
         # Set timeouts
         page.set_default_timeout(30000)  # 30 seconds
         page.set_default_navigation_timeout(30000)
 
-        # Block unnecessary resources for faster loading
-        await page.route("**/*", lambda route: route.abort()
-                        if route.request.resource_type in ["image", "stylesheet", "font", "media"]
-                        else route.continue_())
-
+        page_stats = {'started': time.perf_counter(), 'bytes': None, 'blocked': 0}
+        if lean:
+            await self._block_in_browser(page, page_stats)
+        else:
+            # Block unnecessary resources for faster loading
+            await page.route("**/*", lambda route: route.abort()
+                            if route.request.resource_type in ["image", "stylesheet", "font", "media"]
+                            else route.continue_())
+
+        page.once("close", lambda _: browser_pool.record_page(
+            'lean' if lean else 'full',
+            (time.perf_counter() - page_stats['started']) * 1000,
+            page_stats['bytes'],
+            page_stats['blocked']
+        ))
         return page
 
-    async def wait_for_selector_safe(self, page: Page, selector: str, timeout: int = 10000) -> bool:
+    async def _block_in_browser(self, page: 'Page', page_stats: Dict[str, Any]):
+        """
+        Lean mode blocking. Chromium drops blocklisted URLs itself (CDP setBlockedURLs),
+        and the allowlist is a regex route, which Playwright matches in the browser, so
+        only requests that are actually aborted reach Python.
+        """
+        async def abort(route):
+            page_stats['blocked'] += 1
+            await route.abort()
+
+        try:
+            cdp = await page.context.new_cdp_session(page)
+            await cdp.send('Network.enable')
+            await cdp.send('Network.setBlockedURLs', {'urls': (
+                [f"*://*.{domain}/*" for domain in settings.browser_blocked_domains]
+                + [f"*://{domain}/*" for domain in settings.browser_blocked_domains]
+                + [f"*.{ext}" for ext in settings.browser_blocked_extensions]
+                + [f"*.{ext}?*" for ext in settings.browser_blocked_extensions]
+            )})
+
+            page_stats['bytes'] = 0
+
+            def on_finished(event):
+                page_stats['bytes'] += int(event.get('encodedDataLength') or 0)
+
+            def on_failed(event):
+                if event.get('blockedReason'):
+                    page_stats['blocked'] += 1
+
+            cdp.on('Network.loadingFinished', on_finished)
+            cdp.on('Network.loadingFailed', on_failed)
+        except Exception as e:
+            logger.debug(f"CDP blocking unavailable ({e}), using a route instead")
+            await page.route(_blocklist_pattern(), abort)
+
+        if self.ALLOWED_DOMAINS:
+            await page.route(_outside_allowlist_pattern(self.ALLOWED_DOMAINS), abort)
+
+    async def goto(self, page: 'Page', url: str, wait_for: Optional[str] = None,
+                   wait_timeout: int = 10000, **kwargs):
+        """
+        Navigate after taking a token from the store's rate limiter.
+        Lean pages return at DOMContentLoaded and wait for wait_for instead of network idle.
+        """
+        bucket = rate_limiters.for_url(url)
+        if bucket is not None:
+            await bucket.acquire(time.monotonic() + settings.rate_limit_max_wait)
+
+        if settings.browser_lean_mode:
+            kwargs['wait_until'] = 'domcontentloaded'
+        response = await page.goto(url, **kwargs)
+
+        if wait_for:
+            await self.wait_for_selector_safe(page, wait_for, timeout=wait_timeout)
+        return response
+
+    async def wait_for_selector_safe(self, page: 'Page', selector: str, timeout: int = 10000) -> bool:
         """Safely wait for selector with timeout"""
         try:
             await page.wait_for_selector(selector, timeout=timeout)
@@ -98,14 +156,14 @@ class PlaywrightBaseScraper(ABC):
         except Exception:
             return False
 
-    async def scroll_to_bottom(self, page: Page, max_scrolls: int = 5):
+    async def scroll_to_bottom(self, page: 'Page', max_scrolls: int = 5):
         """Scroll to bottom to trigger lazy loading"""
         for _ in range(max_scrolls):
             await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
             await asyncio.sleep(1)  # Wait for content to load
 
-    def requests_fallback_search(self, query: str) -> List[Dict[str, Any]]:
-        """Fallback search using requests when Playwright fails"""
+    async def requests_fallback_search(self, query: str) -> List[Dict[str, Any]]:
+        """Fallback search using plain HTTP when Playwright fails"""
         try:
             # This should be implemented by subclasses
             logger.info(f"Using requests fallback for query: {query}")
@@ -114,8 +172,8 @@ class PlaywrightBaseScraper(ABC):
             logger.error(f"Requests fallback failed: {e}")
             return []
 
-    def requests_fallback_details(self, game_id: str) -> Dict[str, Any]:
-        """Fallback details using requests when Playwright fails"""
+    async def requests_fallback_details(self, game_id: str) -> Dict[str, Any]:
+        """Fallback details using plain HTTP when Playwright fails"""
         try:
             # This should be implemented by subclasses
             logger.info(f"Using requests fallback for game_id: {game_id}")
@@ -128,25 +186,29 @@ class PlaywrightBaseScraper(ABC):
         """Search for games by query with fallback"""
         if self.use_playwright:
             try:
-                return await self._search_games_playwright(query)
+                with metrics.scrape_seconds.labels(self.STORE, 'search', 'playwright').time():
+                    return await self._search_games_playwright(query)
             except Exception as e:
                 logger.warning(f"Playwright search failed: {e}. Using requests fallback.")
+                metrics.fallbacks.labels(self.STORE, 'playwright').inc()
                 self.use_playwright = False
-                return self.requests_fallback_search(query)
-        else:
-            return self.requests_fallback_search(query)
+
+        with metrics.scrape_seconds.labels(self.STORE, 'search', 'http').time():
+            return await self.requests_fallback_search(query)
 
     async def get_game_details(self, game_id: str) -> Dict[str, Any]:
         """Get detailed information for a specific game with fallback"""
         if self.use_playwright:
             try:
-                return await self._get_game_details_playwright(game_id)
-            except Exception:
+                with metrics.scrape_seconds.labels(self.STORE, 'details', 'playwright').time():
+                    return await self._get_game_details_playwright(game_id)
+            except Exception as e:
                 logger.warning(f"Playwright details failed: {e}. Using requests fallback.")
+                metrics.fallbacks.labels(self.STORE, 'playwright').inc()
                 self.use_playwright = False
-                return self.requests_fallback_details(game_id)
-        else:
-            return self.requests_fallback_details(game_id)
+
+        with metrics.scrape_seconds.labels(self.STORE, 'details', 'http').time():
+            return await self.requests_fallback_details(game_id)
 
     @abstractmethod
     async def _search_games_playwright(self, query: str) -> List[Dict[str, Any]]:
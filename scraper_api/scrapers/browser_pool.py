@@ -0,0 +1,248 @@
+"""
+Process-wide Playwright browser pool
+Launches Chromium once and hands out recycled BrowserContexts to scrapers
+"""
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+import asyncio
+import logging
+import time
+
+from core.config import settings
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page, Playwright
+
+logger = logging.getLogger(__name__)
+
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-accelerated-2d-canvas',
+    '--no-first-run',
+    '--no-zygote',
+    '--single-process',
+    '--disable-gpu'
+]
+
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+class BrowserPool:
+    """Shared Chromium instance with context reuse, a page cap and crash recovery"""
+
+    def __init__(self, headless: bool = True):
+        self.headless = headless
+        self._playwright: Optional['Playwright'] = None
+        self._browser: Optional['Browser'] = None
+        self._idle: Dict[bool, List['BrowserContext']] = {True: [], False: []}  # keyed by JavaScript on/off
+        self._uses: Dict['BrowserContext', int] = {}
+        self._javascript: Dict['BrowserContext', bool] = {}
+        self._open_pages: Set['Page'] = set()
+        self._page_slots: Optional[asyncio.Semaphore] = None
+        self._lock = asyncio.Lock()
+        self._started = False
+        self._start_error: Optional[str] = None
+        self._start_failed_at = 0.0
+
+        # Page metrics per mode ('lean' / 'full')
+        self._page_stats: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def available(self) -> bool:
+        """Whether scrapers can borrow from the pool (launched on first use, retried after a failed launch)"""
+        if self._started:
+            return True
+        if self._start_error is not None and \
+                time.monotonic() - self._start_failed_at < settings.browser_start_retry_seconds:
+            return False
+        return settings.browser_pool_enabled
+
+    async def start(self):
+        """Launch the shared browser; called by the first scraper that needs a page"""
+        if self._started:
+            return
+
+        async with self._lock:
+            if self._started:
+                return
+            if not self.available:
+                # A borrow queued on the lock behind a launch that just failed
+                raise RuntimeError(f"Browser pool unavailable: {self._start_error or 'disabled'}")
+            self._page_slots = asyncio.Semaphore(max(1, settings.browser_max_pages))
+            try:
+                await self._launch()
+            except Exception as e:
+                # Scrapers use HTTP until the retry backoff has passed
+                self._start_error = str(e)
+                self._start_failed_at = time.monotonic()
+                raise
+            self._start_error = None
+            self._started = True
+
+    async def close(self):
+        """Close every context, the browser and the Playwright driver"""
+        self._started = False
+
+        async with self._lock:
+            for context in list(self._uses):
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning(f"Browser context cleanup warning: {e}")
+            self._clear_contexts()
+
+            try:
+                if self._browser:
+                    await self._browser.close()
+                if self._playwright:
+                    await self._playwright.stop()
+                logger.info("🧹 Browser pool shut down")
+            except Exception as e:
+                logger.warning(f"Browser cleanup warning: {e}")
+            finally:
+                self._browser = None
+                self._playwright = None
+
+    async def _launch(self):
+        """Start Playwright (once) and launch a fresh Chromium"""
+        try:
+            if self._playwright is None:
+                # Imported here so only requests that take a browser path pay for Playwright
+                from playwright.async_api import async_playwright
+
+                self._playwright = await async_playwright().start()
+
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=BROWSER_ARGS
+            )
+            self._browser.on("disconnected", self._on_disconnected)
+            logger.info("✅ Shared browser launched")
+        except Exception as e:
+            logger.error(f"❌ Failed to launch shared browser: {e}")
+            raise
+
+    def _clear_contexts(self):
+        for idle in self._idle.values():
+            idle.clear()
+        self._uses.clear()
+        self._javascript.clear()
+
+    def _on_disconnected(self, browser: 'Browser'):
+        """Forget everything tied to a browser that went away"""
+        if browser is not self._browser:
+            return
+
+        logger.warning("⚠️ Shared browser disconnected, it will be restarted on next use")
+        self._clear_contexts()
+        for page in list(self._open_pages):
+            self._release_page_slot(page)
+
+    async def _ensure_browser(self) -> 'Browser':
+        """Return a connected browser, restarting it if it crashed"""
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected():
+                logger.info("🔄 Restarting shared browser")
+                self._clear_contexts()
+                await self._launch()
+            assert self._browser is not None
+            return self._browser
+
+    async def acquire_context(self, javascript: bool = True) -> 'BrowserContext':
+        """Borrow a context (JavaScript on or off); reuses an idle one when possible"""
+        if not self._started:
+            if not self.available:
+                raise RuntimeError(f"Browser pool unavailable: {self._start_error or 'disabled'}")
+            await self.start()
+
+        browser = await self._ensure_browser()
+
+        idle = self._idle[javascript]
+        while idle:
+            context = idle.pop()
+            if context.browser is browser:
+                return context
+
+        context = await browser.new_context(**CONTEXT_OPTIONS, java_script_enabled=javascript)
+        self._uses[context] = 0
+        self._javascript[context] = javascript
+        return context
+
+    async def release_context(self, context: 'BrowserContext'):
+        """Return a context to the pool, recycling it after too many uses"""
+        uses = self._uses.get(context)
+        if uses is None:
+            # Belongs to a browser that has since been restarted
+            return
+
+        uses += 1
+        if not self._started or uses >= settings.browser_context_max_uses or context.browser is not self._browser:
+            self._uses.pop(context, None)
+            self._javascript.pop(context, None)
+            try:
+                await context.close()
+            except Exception as e:
+                logger.warning(f"Browser context cleanup warning: {e}")
+            return
+
+        self._uses[context] = uses
+        self._idle[self._javascript.get(context, True)].append(context)
+
+    async def new_page(self, context: 'BrowserContext') -> 'Page':
+        """Open a page in a borrowed context, waiting for a free page slot"""
+        if self._page_slots is None:
+            raise RuntimeError("Browser pool not started")
+
+        await self._page_slots.acquire()
+        try:
+            page = await context.new_page()
+        except Exception:
+            self._page_slots.release()
+            raise
+
+        self._open_pages.add(page)
+        page.once("close", self._release_page_slot)
+        return page
+
+    def _release_page_slot(self, page: 'Page'):
+        """Give back the page slot held by a page (only once)"""
+        if page in self._open_pages:
+            self._open_pages.discard(page)
+            if self._page_slots is not None:
+                self._page_slots.release()
+
+    def record_page(self, mode: str, elapsed_ms: float, transferred_bytes: Optional[int], blocked: int):
+        """Accumulate per-page load time and transfer size for lean vs full comparison"""
+        stats = self._page_stats.setdefault(mode, {'pages': 0, 'total_ms': 0.0, 'total_bytes': 0, 'measured': 0, 'blocked': 0})
+        stats['pages'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['blocked'] += blocked
+        if transferred_bytes is not None:
+            stats['total_bytes'] += transferred_bytes
+            stats['measured'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        pages = {
+            mode: {
+                'pages': stats['pages'],
+                'avg_ms': round(stats['total_ms'] / stats['pages'], 2),
+                'avg_kb': round(stats['total_bytes'] / stats['measured'] / 1024, 2) if stats['measured'] else None,
+                'blocked_requests': stats['blocked'],
+            }
+            for mode, stats in self._page_stats.items()
+        }
+        return {
+            'available': self.available,
+            'started': self._started,
+            'start_error': self._start_error,
+            'open_pages': len(self._open_pages),
+            'contexts': len(self._uses),
+            'pages': pages,
+        }
+
+
+browser_pool = BrowserPool()
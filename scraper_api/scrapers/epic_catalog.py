@@ -0,0 +1,231 @@
+"""
+Epic Games Store catalog client over plain HTTP
+Queries the store's GraphQL catalog search and returns the same game dicts as EpicScraper
+"""
+from typing import Any, Dict, List, Optional
+import logging
+
+from core.config import settings
+from core.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+STORE_URL = "https://store.epicgames.com"
+
+ELEMENT_FIELDS = """
+        title
+        id
+        namespace
+        description
+        productSlug
+        urlSlug
+        keyImages { type url }
+        offerMappings { pageSlug pageType }
+        catalogNs { mappings(pageType: "productHome") { pageSlug pageType } }
+        price(country: $country) {
+          totalPrice {
+            discountPrice
+            originalPrice
+            currencyCode
+            currencyInfo { decimals }
+          }
+        }
+"""
+
+SEARCH_ARGS = "count: $count, category: $category, country: $country, locale: $locale, sortBy: $sortBy, sortDir: $sortDir"
+SEARCH_VARIABLES = "$count: Int, $category: String, $country: String!, $locale: String, $sortBy: String, $sortDir: String"
+
+SEARCH_STORE_QUERY = f"""
+query searchStoreQuery($keywords: String, {SEARCH_VARIABLES}) {{
+  Catalog {{
+    searchStore(keywords: $keywords, {SEARCH_ARGS}) {{
+      elements {{{ELEMENT_FIELDS}      }}
+    }}
+  }}
+}}
+"""
+
+# Keyword searches sent as aliased searchStore fields of one GraphQL request
+SEARCH_BATCH_SIZE = 10
+
+
+def batch_search_query(size: int) -> str:
+    """One request running searchStore for $k0..$k{size-1}, answered as s0..s{size-1}"""
+    keywords = ', '.join(f"$k{i}: String" for i in range(size))
+    searches = ''.join(
+        f"    s{i}: searchStore(keywords: $k{i}, {SEARCH_ARGS}) {{\n      elements {{{ELEMENT_FIELDS}      }}\n    }}\n"
+        for i in range(size)
+    )
+    return f"query batchSearchStoreQuery({keywords}, {SEARCH_VARIABLES}) {{\n  Catalog {{\n{searches}  }}\n}}\n"
+
+
+# Base games and bundles; skips add-ons, demos and the like
+GAME_CATEGORIES = "games/edition/base|bundles/games|games/edition"
+
+IMAGE_TYPES = ('Thumbnail', 'OfferImageTall', 'DieselStoreFrontTall', 'OfferImageWide', 'DieselStoreFrontWide')
+
+
+class EpicCatalogError(Exception):
+    """The catalog API answered with an error"""
+
+
+class EpicCatalogClient:
+    """Searches Epic's catalog through the shared pooled HTTP client"""
+
+    def __init__(self, graphql_url: Optional[str] = None, country: str = 'US', locale: str = 'en-US'):
+        self.graphql_url = graphql_url or settings.epic_graphql_url
+        self.country = country
+        self.locale = locale
+
+    async def _query_catalog(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a catalog query (with the shared search variables) and return its Catalog object"""
+        response = await http_client.post(
+            self.graphql_url,
+            json={
+                'query': query,
+                'variables': {
+                    'category': GAME_CATEGORIES,
+                    'country': self.country,
+                    'locale': self.locale,
+                    'sortBy': 'relevancy',
+                    'sortDir': 'DESC',
+                    **variables,
+                }
+            },
+            timeout=10
+        )
+        if response.status_code != 200:
+            raise EpicCatalogError(f"catalog search returned status {response.status_code}")
+
+        data = response.json() or {}
+        if data.get('errors'):
+            raise EpicCatalogError(f"catalog search failed: {data['errors'][0].get('message')}")
+
+        return (data.get('data') or {}).get('Catalog') or {}
+
+    async def _search_elements(self, keywords: str, count: int) -> List[Dict[str, Any]]:
+        catalog = await self._query_catalog(SEARCH_STORE_QUERY, {'keywords': keywords, 'count': count})
+        return (catalog.get('searchStore') or {}).get('elements') or []
+
+    async def _search_many(self, terms: List[str], count: int) -> List[Dict[str, Any]]:
+        """
+        Elements of several keyword searches, SEARCH_BATCH_SIZE searches per request.
+        Requests run one after another (they share the store's rate limit); a failed
+        request only loses its own searches, and the call raises only if all of them fail.
+        """
+        elements: List[Dict[str, Any]] = []
+        errors: List[Exception] = []
+        chunks = [terms[start:start + SEARCH_BATCH_SIZE] for start in range(0, len(terms), SEARCH_BATCH_SIZE)]
+        for chunk in chunks:
+            try:
+                catalog = await self._query_catalog(
+                    batch_search_query(len(chunk)),
+                    {'count': count, **{f"k{i}": terms for i, terms in enumerate(chunk)}}
+                )
+            except Exception as e:
+                logger.warning(f"Epic catalog batch search failed for {len(chunk)} searches: {e}")
+                errors.append(e)
+                continue
+            elements.extend(
+                element
+                for i in range(len(chunk))
+                for element in (catalog.get(f"s{i}") or {}).get('elements') or []
+            )
+
+        if chunks and len(errors) == len(chunks):
+            raise errors[-1]
+        return elements
+
+    async def search(self, query: str, count: int = 10) -> List[Dict[str, Any]]:
+        """Search the catalog; returns EpicScraper-style game dicts"""
+        games = []
+        for element in await self._search_elements(query, count):
+            game = self._game_from_element(element)
+            if game:
+                games.append(game)
+
+        logger.info(f"Found {len(games)} games on Epic (catalog API) for query: {query}")
+        return games
+
+    async def get_by_slug(self, slug: str, keywords: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Look up one product by slug (see get_by_slugs)"""
+        return (await self.get_by_slugs({slug: keywords})).get(slug)
+
+    async def get_by_slugs(self, games: Dict[str, Optional[str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up products by slug ({slug: keywords such as its title}).
+        The catalog has no slug filter, so every slug's keywords are searched in
+        batched requests and exact slug matches are kept; slugs still missing are
+        searched once more by the slug's words.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        passes = [
+            {slug: keywords or slug.replace('-', ' ') for slug, keywords in games.items()},
+            {slug: slug.replace('-', ' ') for slug, keywords in games.items()
+             if keywords and keywords != slug.replace('-', ' ')},
+        ]
+        for terms in passes:
+            wanted = {slug: term for slug, term in terms.items() if slug not in found}
+            if not wanted:
+                continue
+            try:
+                elements = await self._search_many(list(dict.fromkeys(wanted.values())), 20)
+            except Exception as e:
+                if not found:
+                    raise
+                # Keep the products the first pass already found
+                logger.warning(f"Epic catalog slug search failed for {len(wanted)} slugs: {e}")
+                break
+            for element in elements:
+                game = self._game_from_element(element)
+                if game and game['epic_slug'] in wanted and game['epic_slug'] not in found:
+                    game['description'] = element.get('description')
+                    found[game['epic_slug']] = game
+        return found
+
+    @staticmethod
+    def _slug_from_element(element: Dict[str, Any]) -> Optional[str]:
+        candidates = [element.get('productSlug'), element.get('urlSlug')]
+        candidates += [m.get('pageSlug') for m in element.get('offerMappings') or []]
+        candidates += [m.get('pageSlug') for m in (element.get('catalogNs') or {}).get('mappings') or []]
+
+        for slug in candidates:
+            # productSlug is sometimes "name/home"; urlSlug can be an opaque offer id
+            if slug and slug != element.get('id'):
+                return slug.split('/')[0]
+        return None
+
+    @staticmethod
+    def _image_from_element(element: Dict[str, Any]) -> Optional[str]:
+        images = {image.get('type'): image.get('url') for image in element.get('keyImages') or []}
+        for image_type in IMAGE_TYPES:
+            if images.get(image_type):
+                return images[image_type]
+        return next(iter(images.values()), None)
+
+    def _game_from_element(self, element: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        title = element.get('title')
+        slug = self._slug_from_element(element)
+        if not title or not slug:
+            return None
+
+        total_price = ((element.get('price') or {}).get('totalPrice')) or {}
+        decimals = (total_price.get('currencyInfo') or {}).get('decimals', 2)
+        price = None
+        discount_percent = 0
+        if total_price.get('discountPrice') is not None:
+            price = total_price['discountPrice'] / (10 ** decimals)
+            original = total_price.get('originalPrice') or 0
+            if original > total_price['discountPrice']:
+                discount_percent = round((original - total_price['discountPrice']) / original * 100)
+
+        return {
+            'title': title,
+            'epic_slug': slug,
+            'url': f"{STORE_URL}/p/{slug}",
+            'image_url': self._image_from_element(element),
+            'price': price,
+            'discount_percent': discount_percent,
+            'is_free': price == 0,
+            'store': 'epic'
+        }
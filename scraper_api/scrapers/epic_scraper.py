@@ -1,11 +1,15 @@
 """
-Epic Games Store scraper using Playwright
+Epic Games Store scraper: catalog API first, Playwright as a last resort
 """
 from typing import Dict, List, Optional, Any
 from .base_scraper import PlaywrightBaseScraper
+from .epic_catalog import EpicCatalogClient
 import logging
 import re
-import requests
+
+from core import metrics
+from core.config import settings
+from core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +19,39 @@ class EpicScraper(PlaywrightBaseScraper):
 
     BASE_URL = "https://store.epicgames.com"
     EXCHANGE_RATE_EUR_TO_COP = 1
+
+    STORE = 'epic'
+
+    # The storefront is a React app
+    NEEDS_JAVASCRIPT = True
+    ALLOWED_DOMAINS = ('epicgames.com', 'unrealengine.com')
+
+    def __init__(self, headless: bool = True):
+        super().__init__(headless)
+        self.catalog = EpicCatalogClient()
+
+    async def search_games(self, query: str) -> List[Dict[str, Any]]:
+        """Search through the catalog API; the storefront is only scraped if the API fails"""
+        try:
+            with metrics.scrape_seconds.labels(self.STORE, 'search', 'catalog').time():
+                return await self.catalog.search(query)
+        except Exception as e:
+            logger.warning(f"Epic catalog search failed for '{query}': {e}. Using browser.")
+            metrics.fallbacks.labels(self.STORE, 'catalog').inc()
+        return await super().search_games(query)
+
+    async def get_game_details(self, slug: str) -> Dict[str, Any]:
+        """Product details through the catalog API, falling back to the storefront"""
+        try:
+            with metrics.scrape_seconds.labels(self.STORE, 'details', 'catalog').time():
+                game = await self.catalog.get_by_slug(slug)
+            if game:
+                return game
+        except Exception as e:
+            logger.warning(f"Epic catalog lookup failed for {slug}: {e}. Using browser.")
+            metrics.fallbacks.labels(self.STORE, 'catalog').inc()
+        return await super().get_game_details(slug)
+
     async def _search_games_playwright(self, query: str) -> List[Dict[str, Any]]:
         """Search Epic Games store for games"""
         games = []
@@ -24,13 +61,13 @@ class EpicScraper(PlaywrightBaseScraper):
 
             # Navigate to search page
             search_url = f"{self.BASE_URL}/es-ES/browse?q={query.replace(' ', '+')}&sortBy=relevancy&sortDir=DESC&count=40"
-            await page.goto(search_url, wait_until="networkidle")
-
             # Wait for content to load (Epic uses React, so wait for specific elements)
-            await self.wait_for_selector_safe(page, "[data-testid='search-results']", timeout=15000)
+            await self.goto(page, search_url, wait_until="networkidle",
+                            wait_for="[data-testid='search-results']", wait_timeout=15000)
 
-            # Scroll to load more results
-            await self.scroll_to_bottom(page, max_scrolls=3)
+            # Scroll to load more results (lean mode only reads the first, already rendered, cards)
+            if not settings.browser_lean_mode:
+                await self.scroll_to_bottom(page, max_scrolls=3)
 
             # Extract game data from React components
             games_data = await page.evaluate("""
@@ -122,10 +159,9 @@ class EpicScraper(PlaywrightBaseScraper):
 
             # Navigate to game page
             game_url = f"{self.BASE_URL}/es-ES/p/{slug}"
-            await page.goto(game_url, wait_until="networkidle")
-
             # Wait for content to load
-            await self.wait_for_selector_safe(page, "[data-testid='product-title']", timeout=15000)
+            await self.goto(page, game_url, wait_until="networkidle",
+                            wait_for="[data-testid='product-title']", wait_timeout=15000)
 
             # Extract detailed game data
             game_data = await page.evaluate("""
@@ -208,7 +244,7 @@ class EpicScraper(PlaywrightBaseScraper):
             logger.warning(f"Could not parse Epic price: {price_text}")
             return None
 
-    def requests_fallback_search(self, query: str) -> List[Dict[str, Any]]:
+    async def requests_fallback_search(self, query: str) -> List[Dict[str, Any]]:
         """Fallback search using Epic Games API when Playwright fails"""
         try:
             # Epic Games doesn't have a public search API, so we'll use a simple fallback
@@ -216,8 +252,7 @@ class EpicScraper(PlaywrightBaseScraper):
             logger.info(f"Using basic fallback for Epic search: {query}")
 
             # Try to get free games from Epic's free games API
-            free_games_url = "https://store-site-backend-static.ak.epicgames.com/freeGamesPromotions"
-            response = requests.get(free_games_url, timeout=10)
+            response = await http_client.get(settings.epic_free_games_url, timeout=10)
 
             if response.status_code == 200:
                 data = response.json()
@@ -255,7 +290,7 @@ class EpicScraper(PlaywrightBaseScraper):
             logger.error(f"Epic fallback search failed: {e}")
             return []
 
-    def requests_fallback_details(self, slug: str) -> Dict[str, Any]:
+    async def requests_fallback_details(self, slug: str) -> Dict[str, Any]:
         """Fallback details using Epic Games API when Playwright fails"""
         try:
             # Epic Games doesn't have a public details API, so we'll use a simple fallback
@@ -1,11 +1,14 @@
 """
 Steam Store scraper using Playwright
 """
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any
 from .base_scraper import PlaywrightBaseScraper
+import asyncio
 import logging
 import re
-import requests
+
+from core.config import settings
+from core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +18,11 @@ class SteamScraper(PlaywrightBaseScraper):
 
     BASE_URL = "https://store.steampowered.com"
     EXCHANGE_RATE_USD_TO_COP = 1 # Exchange rate: 1 USD = 4000 COP (for display purposes)
+    STORE = 'steam'
+
+    # Search and app pages are server-rendered
+    NEEDS_JAVASCRIPT = False
+    ALLOWED_DOMAINS = ('steampowered.com', 'steamstatic.com')
 
     async def _search_games_playwright(self, query: str) -> List[Dict[str, Any]]:
         """Search Steam store for games"""
@@ -25,10 +33,8 @@ class SteamScraper(PlaywrightBaseScraper):
 
             # Navigate to search page
             search_url = f"{self.BASE_URL}/search/?term={query.replace(' ', '+')}"
-            await page.goto(search_url, wait_until="networkidle")
-
             # Wait for search results to load
-            await self.wait_for_selector_safe(page, ".search_results")
+            await self.goto(page, search_url, wait_until="networkidle", wait_for=".search_results")
 
             # Extract game data
             games_data = await page.evaluate("""
@@ -36,7 +42,7 @@ class SteamScraper(PlaywrightBaseScraper):
                     const games = [];
                     const rows = document.querySelectorAll('.search_result_row');
 
-                    for (const row of rows.slice(0, 10)) {  // Limit to first 10 results
+                    for (const row of Array.from(rows).slice(0, 10)) {  // Limit to first 10 results
                         const titleElement = row.querySelector('.title');
                         const priceElement = row.querySelector('.discount_final_price, .search_price');
                         const discountElement = row.querySelector('.discount_pct');
@@ -106,10 +112,8 @@ class SteamScraper(PlaywrightBaseScraper):
 
             # Navigate to game page
             game_url = f"{self.BASE_URL}/app/{app_id}/"
-            await page.goto(game_url, wait_until="networkidle")
-
             # Wait for content to load
-            await self.wait_for_selector_safe(page, ".apphub_AppName")
+            await self.goto(page, game_url, wait_until="networkidle", wait_for=".apphub_AppName")
 
             # Extract detailed game data
             game_data = await page.evaluate("""
@@ -190,41 +194,30 @@ class SteamScraper(PlaywrightBaseScraper):
             logger.warning(f"Could not parse price: {price_text}")
             return None
 
-    def requests_fallback_search(self, query: str) -> List[Dict[str, Any]]:
+    async def requests_fallback_search(self, query: str) -> List[Dict[str, Any]]:
         """Fallback search using Steam API when Playwright fails"""
         try:
-            # Use Steam's search API
             search_url = f"https://store.steampowered.com/api/storesearch/?term={query}&l=english&cc=US"
-            response = requests.get(search_url, timeout=10)
+            response = await http_client.get(search_url, timeout=10)
+            if response.status_code != 200:
+                logger.warning(f"Steam API search failed with status {response.status_code}")
+                return []
+            # Only apps have a store page and appdetails price (skips bundles/packages)
+            items = [item for item in response.json().get('items', []) if item.get('type', 'app') == 'app']
 
-            if response.status_code == 200:
-                data = response.json()
+            if items:
                 games = []
 
-                for item in data.get('items', [])[:10]:  # Limit to 10 results
-                    # Get detailed price info from appdetails API
+                items = items[:10]  # Limit to 10 results
+
+                # Resolve every hit's price in one batched appdetails call
+                prices = await self.get_prices([item.get('id') for item in items if item.get('id')])
+
+                for item in items:
                     app_id = item.get('id')
-                    price = None
-                    is_free = False
-
-                    if app_id:
-                        try:
-                            details_url = f"https://store.steampowered.com/api/appdetails?appids={app_id}&cc=US"
-                            details_response = requests.get(details_url, timeout=10)
-
-                            if details_response.status_code == 200:
-                                details_data = details_response.json()
-                                if str(app_id) in details_data and details_data[str(app_id)].get('success'):
-                                    app_data = details_data[str(app_id)]['data']
-                                    price_info = app_data.get('price_overview', {})
-
-                                    if price_info:
-                                        price = price_info.get('final', 0) / 100.0  # Convert cents to dollars
-                                        is_free = price == 0
-                                    else:
-                                        is_free = app_data.get('is_free', False)
-                        except Exception as e:
-                            logger.warning(f"Failed to get price for app {app_id}: {e}")
+                    price_entry = prices.get(str(app_id)) if app_id else None
+                    price = price_entry['price'] if price_entry else None
+                    is_free = price_entry['is_free'] if price_entry else False
 
                     game = {
                         'title': item.get('name', ''),
@@ -232,7 +225,7 @@ class SteamScraper(PlaywrightBaseScraper):
                         'url': f"https://store.steampowered.com/app/{app_id}/" if app_id else None,
                         'image_url': item.get('tiny_image'),
                         'price': price,
-                        'discount_percent': 0,  # API doesn't provide discount info easily
+                        'discount_percent': price_entry['discount_percent'] if price_entry else 0,
                         'is_free': is_free,
                         'store': 'steam'
                     }
@@ -240,19 +233,117 @@ class SteamScraper(PlaywrightBaseScraper):
 
                 logger.info(f"Found {len(games)} games on Steam (API fallback) for query: {query}")
                 return games
-            else:
-                logger.warning(f"Steam API search failed with status {response.status_code}")
-                return []
+            return []
 
         except Exception as e:
             logger.error(f"Steam API fallback search failed: {e}")
             return []
 
-    def requests_fallback_details(self, app_id: str) -> Dict[str, Any]:
+    async def get_prices(self, app_ids: Iterable[Any]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get current prices for many Steam apps in as few requests as possible.
+        Returns {app_id: {'price', 'discount_percent', 'is_free'} or None}
+        """
+        ids = list(dict.fromkeys(str(app_id) for app_id in app_ids if app_id))
+        prices: Dict[str, Optional[Dict[str, Any]]] = {}
+        unresolved: List[str] = []
+
+        batch_size = max(1, settings.steam_price_batch_size)
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            try:
+                batch = await self._fetch_price_batch(chunk)
+            except Exception as e:
+                logger.warning(f"Steam batched price fetch failed for {len(chunk)} apps: {e}")
+                batch = {}
+
+            for app_id in chunk:
+                if app_id in batch:
+                    prices[app_id] = batch[app_id]
+                else:
+                    unresolved.append(app_id)
+
+        if unresolved:
+            # Batch failed or had no price_overview (e.g. free games): fetch those one by one
+            semaphore = asyncio.Semaphore(max(1, settings.steam_price_fetch_concurrency))
+
+            async def fetch_one(app_id: str):
+                async with semaphore:
+                    return app_id, await self._fetch_single_price(app_id)
+
+            for app_id, price in await asyncio.gather(*(fetch_one(app_id) for app_id in unresolved)):
+                prices[app_id] = price
+
+        return prices
+
+    async def _fetch_price_batch(self, app_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch price_overview for several apps with a single appdetails call"""
+        response = await http_client.get(
+            f"{self.BASE_URL}/api/appdetails",
+            params={'appids': ','.join(app_ids), 'filters': 'price_overview', 'cc': 'US'},
+            timeout=10
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"appdetails returned status {response.status_code}")
+
+        data = response.json() or {}
+        prices: Dict[str, Optional[Dict[str, Any]]] = {}
+
+        for app_id in app_ids:
+            entry = data.get(app_id)
+            if not entry:
+                continue
+            if not entry.get('success'):
+                prices[app_id] = None
+                continue
+
+            app_data = entry.get('data')
+            # Steam returns an empty list instead of an object when there is no price_overview
+            if isinstance(app_data, dict) and app_data.get('price_overview'):
+                prices[app_id] = self._price_from_overview(app_data['price_overview'])
+
+        return prices
+
+    async def _fetch_single_price(self, app_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch one app's price from the unfiltered appdetails endpoint"""
+        try:
+            response = await http_client.get(
+                f"{self.BASE_URL}/api/appdetails",
+                params={'appids': app_id, 'cc': 'US'},
+                timeout=10
+            )
+            if response.status_code != 200:
+                return None
+
+            entry = response.json().get(app_id, {})
+            if not entry.get('success'):
+                return None
+
+            app_data = entry.get('data') or {}
+            if app_data.get('price_overview'):
+                return self._price_from_overview(app_data['price_overview'])
+            if app_data.get('is_free'):
+                return {'price': 0.0, 'discount_percent': 0, 'is_free': True}
+            return None
+
+        except Exception as e:
+            logger.warning(f"Failed to get price for app {app_id}: {e}")
+            return None
+
+    def _price_from_overview(self, price_info: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a Steam price_overview block to our price dict"""
+        price = price_info.get('final', 0) / 100.0  # Convert cents to dollars
+        return {
+            'price': price,
+            'discount_percent': price_info.get('discount_percent', 0),
+            'is_free': price == 0
+        }
+
+    async def requests_fallback_details(self, app_id: str) -> Dict[str, Any]:
         """Fallback details using Steam API when Playwright fails"""
         try:
             details_url = f"https://store.steampowered.com/api/appdetails?appids={app_id}&cc=US"
-            response = requests.get(details_url, timeout=10)
+            response = await http_client.get(details_url, timeout=10)
 
             if response.status_code == 200:
                 data = response.json()
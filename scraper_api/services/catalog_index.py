@@ -0,0 +1,119 @@
+"""
+In-memory search index over the games catalog
+Trigram postings plus token-prefix matching, so known games are found without scraping
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns kept in memory per game (enough to build a search result)
+CATALOG_COLUMNS = ('id', 'title', 'normalized_title', 'steam_app_id', 'epic_slug', 'description', 'image_url')
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of a normalized string, padded so word starts count"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CatalogIndex:
+    """Trigram index of games keyed by normalized title; updated incrementally"""
+
+    def __init__(self, min_score: float = 0.6):
+        self.min_score = min_score
+        self.loaded = False
+        self._games: Dict[str, Dict[str, Any]] = {}
+        self._title_trigrams: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._by_store_id: Dict[Tuple[str, str], str] = {}  # ('steam', app_id) / ('epic', slug) -> game id
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def add(self, game: Dict[str, Any]):
+        """Insert or update one game row"""
+        game_id = str(game.get('id') or '')
+        normalized_title = game.get('normalized_title')
+        if not game_id or not normalized_title:
+            return
+
+        previous = self._games.get(game_id)
+        if previous is not None and previous['normalized_title'] != normalized_title:
+            self._remove_postings(game_id)
+
+        self._games[game_id] = {column: game.get(column) for column in CATALOG_COLUMNS}
+        if game.get('steam_app_id'):
+            self._by_store_id[('steam', str(game['steam_app_id']))] = game_id
+        if game.get('epic_slug'):
+            self._by_store_id[('epic', game['epic_slug'])] = game_id
+        if game_id not in self._title_trigrams:
+            grams = trigrams(normalized_title)
+            self._title_trigrams[game_id] = grams
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(game_id)
+
+    def add_many(self, games: Iterable[Dict[str, Any]]):
+        for game in games:
+            self.add(game)
+
+    def _remove_postings(self, game_id: str):
+        for gram in self._title_trigrams.pop(game_id, set()):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(game_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def search(self, normalized_query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Games whose titles match an already normalized query, best first.
+        Trigrams find and rank candidates (favouring titles that contain the whole
+        query, so "halo" finds "halo the master chief collection"); every query
+        word must prefix a title word so near-misses fall through to scraping.
+        """
+        query_grams = trigrams(normalized_query) if normalized_query else set()
+        if not query_grams:
+            return []
+
+        shared: Dict[str, int] = {}
+        for gram in query_grams:
+            for game_id in self._postings.get(gram, ()):
+                shared[game_id] = shared.get(game_id, 0) + 1
+
+        query_tokens = normalized_query.split()
+        scored = []
+        for game_id, count in shared.items():
+            title_grams = self._title_trigrams[game_id]
+            coverage = count / len(query_grams)
+            jaccard = count / (len(query_grams) + len(title_grams) - count)
+            score = 0.7 * coverage + 0.3 * jaccard
+
+            # Every query word must start a title word: "hades ii" must not answer with "hades"
+            title_tokens = self._games[game_id]['normalized_title'].split()
+            if not all(any(token.startswith(q) for token in title_tokens) for q in query_tokens):
+                continue
+
+            if score >= self.min_score:
+                scored.append((score, game_id))
+
+        scored.sort(key=lambda item: (-item[0], self._games[item[1]]['normalized_title']))
+        return [dict(self._games[game_id]) for _, game_id in scored[:limit]]
+
+    def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        game = self._games.get(str(game_id))
+        return dict(game) if game else None
+
+    def find_by_store_id(self, store: str, store_id: Any) -> Optional[Dict[str, Any]]:
+        """The known game for a Steam app ID or Epic slug (including persisted cross-store matches)"""
+        if not store_id:
+            return None
+        game_id = self._by_store_id.get((store, str(store_id)))
+        return self.get(game_id) if game_id else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'loaded': self.loaded,
+            'games': len(self._games),
+            'trigrams': len(self._postings),
+        }
@@ -0,0 +1,146 @@
+"""
+Set-based wishlist notification evaluation
+Loads targets and previous prices for a whole batch in bulk, decides in memory, inserts once
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+import logging
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# user_id -> game_id -> {'steam': price, 'epic': price}
+FreshPrices = Dict[str, Dict[str, Dict[str, Optional[float]]]]
+
+PRICE_DROP_THRESHOLD = 10  # percent
+STORE_NAMES = {'steam': 'Steam', 'epic': 'Epic'}
+
+
+def target_marker(target_price: float) -> str:
+    """The part of a target_reached message naming the target it was sent for"""
+    return f"(target: {target_price}€)"
+
+
+def evaluate_price_events(fresh_prices: FreshPrices,
+                          targets: Dict[Tuple[str, str], Optional[float]],
+                          previous: Dict[Tuple[str, str], Optional[float]],
+                          notified: Optional[Set[Tuple[str, str]]] = None) -> List[Dict[str, Any]]:
+    """
+    Compute notification rows from fresh prices.
+    targets: (user_id, game_id) -> target_price for wishlisted games
+    previous: (game_id, store) -> last stored price, compared per store
+    notified: (user_id, game_id) pairs already sent target_reached for their current target
+    """
+    notified = notified or set()
+    notifications = []
+
+    for user_id, games in fresh_prices.items():
+        for game_id, prices in games.items():
+            key = (user_id, game_id)
+            if key not in targets:
+                continue  # Not on this user's wishlist
+            target_price = targets[key]
+
+            # Target reached: the best current price is at or below the target and either
+            # this target was never notified (e.g. already met when it was set) or the
+            # price just crossed below it again
+            if target_price:
+                reached = [
+                    (price, store) for store, price in prices.items()
+                    if price is not None and price <= target_price
+                    and (key not in notified or previous.get((game_id, store)) is None
+                         or previous[(game_id, store)] > target_price)
+                ]
+                if reached:
+                    current_price, store = min(reached)
+                    notifications.append({
+                        'user_id': user_id,
+                        'game_id': game_id,
+                        'type': 'target_reached',
+                        'message': f"Price target reached on {STORE_NAMES.get(store, store)}! "
+                                   f"Now {current_price}€ {target_marker(target_price)}"
+                    })
+
+            # Significant price drop, comparing each store with its own history
+            for store, current_price in prices.items():
+                previous_price = previous.get((game_id, store))
+                if current_price is None or not previous_price or previous_price <= 0:
+                    continue
+                drop_percent = ((previous_price - current_price) / previous_price) * 100
+                if drop_percent >= PRICE_DROP_THRESHOLD:
+                    notifications.append({
+                        'user_id': user_id,
+                        'game_id': game_id,
+                        'type': 'price_drop',
+                        'message': f"Price dropped {drop_percent:.1f}% on {STORE_NAMES.get(store, store)}! "
+                                   f"Now {current_price}€ (was {previous_price}€)"
+                    })
+
+    return notifications
+
+
+class NotificationEvaluator:
+    """Evaluates price notifications for one or many users in a couple of round-trips"""
+
+    def __init__(self, supabase_service):
+        self.supabase_service = supabase_service
+
+    async def evaluate(self, fresh_prices: FreshPrices) -> List[Dict[str, Any]]:
+        """
+        Build notification rows for freshly scraped prices.
+        Must run before those prices are saved, so "previous" is the last stored price.
+        """
+        with metrics.notification_seconds.time():
+            return await self._evaluate(fresh_prices)
+
+    async def _evaluate(self, fresh_prices: FreshPrices) -> List[Dict[str, Any]]:
+        user_ids = list(fresh_prices.keys())
+        game_ids = list(dict.fromkeys(game_id for games in fresh_prices.values() for game_id in games))
+        if not user_ids or not game_ids:
+            return []
+
+        wishlist_rows = await self.supabase_service.get_wishlist_targets(user_ids, game_ids)
+        targets = {
+            (str(row['user_id']), str(row['game_id'])): row.get('target_price')
+            for row in wishlist_rows
+        }
+        if not targets:
+            return []
+
+        latest = await self.supabase_service.get_latest_prices(
+            list(dict.fromkeys(game_id for _, game_id in targets))
+        )
+        previous = {key: row.get('price') for key, row in latest.items()}
+
+        # Earlier target_reached notifications, only for games currently at or below their target
+        met = [
+            key for key, target_price in targets.items()
+            if target_price and any(
+                price is not None and price <= target_price
+                for price in fresh_prices.get(key[0], {}).get(key[1], {}).values()
+            )
+        ]
+        notified: Set[Tuple[str, str]] = set()
+        if met:
+            sent = await self.supabase_service.get_target_notifications(
+                list(dict.fromkeys(user_id for user_id, _ in met)),
+                list(dict.fromkeys(game_id for _, game_id in met))
+            )
+            for row in sent:
+                key = (str(row['user_id']), str(row['game_id']))
+                if key in targets and target_marker(targets[key]) in (row.get('message') or ''):
+                    notified.add(key)
+
+        return evaluate_price_events(fresh_prices, targets, previous, notified)
+
+    async def notify(self, notifications: List[Dict[str, Any]]) -> int:
+        """Insert evaluated notifications in one batch"""
+        return await self.supabase_service.create_notifications_bulk(notifications)
+
+    async def evaluate_and_notify(self, fresh_prices: FreshPrices) -> int:
+        """Evaluate and insert in one go; returns notifications created"""
+        try:
+            return await self.notify(await self.evaluate(fresh_prices))
+        except Exception as e:
+            logger.error(f"Error checking notifications: {e}")
+            return 0
@@ -0,0 +1,143 @@
+"""
+Write buffer for price_history rows
+Collects rows from refreshers and flushes them as multi-row inserts on size or time
+"""
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PriceHistoryWriteBuffer:
+    """Buffers price_history rows and writes them in bounded, retried batches"""
+
+    def __init__(self, supabase_service, max_batch_rows: int, flush_interval: float,
+                 max_buffered_rows: int, max_retries: int):
+        self.supabase_service = supabase_service
+        self.max_batch_rows = max(1, max_batch_rows)
+        self.flush_interval = flush_interval
+        self.max_buffered_rows = max(self.max_batch_rows, max_buffered_rows)
+        self.max_retries = max(0, max_retries)
+
+        self._rows: List[Dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self._flushes = 0
+        self._failed_flushes = 0
+        self._rows_written = 0
+        self._dropped_rows = 0
+        self._last_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+        self._last_batch_size = 0
+        self._max_batch_size = 0
+
+    async def start(self):
+        """Start the periodic flusher"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the periodic flusher and write out whatever is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush_all()
+
+    async def add(self, rows: List[Dict[str, Any]]) -> bool:
+        """Queue rows; flushes immediately once a full batch is waiting (returns False if that flush failed)"""
+        if not rows:
+            return True
+
+        self._rows.extend(rows)
+
+        overflow = len(self._rows) - self.max_buffered_rows
+        if overflow > 0:
+            # Keep memory bounded if the database is down: drop the oldest rows
+            del self._rows[:overflow]
+            self._dropped_rows += overflow
+            logger.warning(f"Price history buffer full, dropped {overflow} oldest rows")
+
+        if len(self._rows) >= self.max_batch_rows:
+            return await self.flush()
+        return True
+
+    async def flush(self) -> bool:
+        """Write one batch of buffered rows; returns False if it could not be written"""
+        async with self._flush_lock:
+            if not self._rows:
+                return True
+
+            batch = self._rows[:self.max_batch_rows]
+            del self._rows[:len(batch)]
+
+            started = time.perf_counter()
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await self.supabase_service.save_price_history_bulk(batch)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        self._failed_flushes += 1
+                        self._dropped_rows += len(batch)
+                        logger.error(f"Price history flush of {len(batch)} rows failed after {attempt + 1} attempts: {e}")
+                        return False
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._flushes += 1
+            self._rows_written += len(batch)
+            self._last_flush_ms = elapsed_ms
+            self._total_flush_ms += elapsed_ms
+            self._last_batch_size = len(batch)
+            self._max_batch_size = max(self._max_batch_size, len(batch))
+            return True
+
+    async def flush_all(self) -> bool:
+        """Write batches until the buffer is empty; returns False as soon as one fails"""
+        while self._rows:
+            if not await self.flush():
+                return False
+        return True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush_all()
+            except Exception as e:
+                logger.error(f"Price history periodic flush failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending_rows': len(self._rows),
+            'flushes': self._flushes,
+            'failed_flushes': self._failed_flushes,
+            'rows_written': self._rows_written,
+            'dropped_rows': self._dropped_rows,
+            'last_flush_ms': round(self._last_flush_ms, 2),
+            'avg_flush_ms': round(self._total_flush_ms / self._flushes, 2) if self._flushes else 0.0,
+            'last_batch_size': self._last_batch_size,
+            'max_batch_size': self._max_batch_size,
+        }
+
+
+def create_price_history_buffer(supabase_service) -> PriceHistoryWriteBuffer:
+    """Build the buffer from settings"""
+    return PriceHistoryWriteBuffer(
+        supabase_service,
+        max_batch_rows=settings.price_history_batch_rows,
+        flush_interval=settings.price_history_flush_interval,
+        max_buffered_rows=settings.price_history_max_buffered_rows,
+        max_retries=settings.max_retries
+    )
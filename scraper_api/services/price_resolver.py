@@ -0,0 +1,95 @@
+"""
+Price resolution stage for merged search results
+Collects every missing (store, id) price, resolves each store with one batched
+lookup through the price cache and applies the answers in a single pass
+"""
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+
+from core import metrics
+from services.price_service import fetch_epic_prices, fetch_steam_prices
+
+logger = logging.getLogger(__name__)
+
+STORE_KEYS = {'steam': 'steam_app_id', 'epic': 'epic_slug'}
+
+
+def collect_missing(merged_results: List[Dict[str, Any]]) -> Dict[str, Dict[str, Optional[str]]]:
+    """{store: {store_id: title}} for every game that has a store ID but no price there"""
+    missing: Dict[str, Dict[str, Optional[str]]] = {store: {} for store in STORE_KEYS}
+    for game_data in merged_results:
+        game = game_data['game']
+        for store, key in STORE_KEYS.items():
+            if game.get(key) and not game_data['prices'].get(store):
+                missing[store][str(game[key])] = game.get('title')
+    return {store: ids for store, ids in missing.items() if ids}
+
+
+async def resolve(missing: Dict[str, Dict[str, Optional[str]]]) -> Dict[str, Dict[str, Any]]:
+    """{store: {store_id: price entry}}; the stores are looked up concurrently"""
+    lookups = {
+        'steam': lambda ids: fetch_steam_prices(list(ids)),
+        'epic': fetch_epic_prices,
+    }
+    stores = list(missing)
+    answers = await asyncio.gather(
+        *(lookups[store](missing[store]) for store in stores),
+        return_exceptions=True
+    )
+
+    resolved: Dict[str, Dict[str, Any]] = {}
+    for store, answer in zip(stores, answers):
+        if isinstance(answer, Exception):
+            logger.warning(f"Failed to get {store} prices for {len(missing[store])} games: {answer}")
+            metrics.store_errors.labels(store, 'price').inc()
+            continue
+        resolved[store] = answer
+    return resolved
+
+
+def store_price(store: str, store_id: str, entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """A price cache entry in the shape of a merged result's prices[store]"""
+    if not entry or entry.get('price') is None:
+        return None
+
+    if store == 'steam':
+        return {
+            'price': entry['price'],
+            'url': f"https://store.steampowered.com/app/{store_id}",
+            'is_free': entry['is_free'],
+            'discount_percent': entry['discount_percent']
+        }
+    return {**entry, 'url': entry.get('url') or f"https://store.epicgames.com/p/{store_id}"}
+
+
+def apply(merged_results: List[Dict[str, Any]], resolved: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Write resolved prices into the merged results; returns the entries that changed"""
+    updated = []
+    for game_data in merged_results:
+        game = game_data['game']
+        prices = game_data['prices']
+        changed = False
+
+        for store, key in STORE_KEYS.items():
+            if not game.get(key) or prices.get(store):
+                continue
+            store_id = str(game[key])
+            price = store_price(store, store_id, resolved.get(store, {}).get(store_id))
+            if price is not None:
+                prices[store] = price
+                changed = True
+
+        if changed:
+            updated.append(game_data)
+
+    return updated
+
+
+async def resolve_missing_prices(merged_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fill in every store price the search pages didn't show; returns the entries that changed"""
+    missing = collect_missing(merged_results)
+    if not missing:
+        return []
+    with metrics.stage_seconds.labels('price_resolution').time():
+        return apply(merged_results, await resolve(missing))
@@ -0,0 +1,66 @@
+"""
+Store price lookups by ID, shared by request handlers and the background refresher
+Every lookup goes through the coalescing price cache
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from core.cache import price_cache
+
+
+def parse_scraped_at(value: Optional[str]) -> Optional[datetime]:
+    """Parse a price_history scraped_at timestamp as an aware UTC datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def fetch_steam_prices(app_ids: List[Any]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Steam prices by app ID, served from the shared price cache when fresh"""
+    from scrapers.steam_scraper import SteamScraper
+    return await price_cache.get_many('steam', app_ids, SteamScraper().get_prices)
+
+
+async def fetch_epic_prices(games: Dict[str, Optional[str]]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Epic prices by slug ({epic_slug: title}), served from the shared price cache when fresh.
+    Uncached slugs are resolved together by EpicCatalogClient.get_by_slugs (batched catalog searches).
+    """
+    async def fetch(slugs: List[str]) -> Dict[str, Any]:
+        from scrapers.epic_catalog import EpicCatalogClient
+        found = await EpicCatalogClient().get_by_slugs({slug: games.get(slug) for slug in slugs})
+        return {
+            slug: {
+                'price': game['price'],
+                'url': game.get('url'),
+                'is_free': game['price'] == 0,
+                'discount_percent': game.get('discount_percent', 0)
+            }
+            for slug, game in found.items()
+            if game.get('price') is not None
+        }
+
+    return await price_cache.get_many('epic', list(games), fetch)
+
+
+def remember_scraped_prices(steam_results: List[Dict[str, Any]], epic_results: List[Dict[str, Any]]):
+    """Seed the price cache with prices a store search just scraped (entries are stamped now, so never pass cached results)"""
+    for game in steam_results:
+        if game.get('steam_app_id') and game.get('price') is not None:
+            price_cache.put('steam', str(game['steam_app_id']), {
+                'price': game['price'],
+                'discount_percent': game.get('discount_percent', 0),
+                'is_free': game.get('is_free', False)
+            })
+    for game in epic_results:
+        if game.get('epic_slug') and game.get('price') is not None:
+            price_cache.put('epic', game['epic_slug'], {
+                'price': game['price'],
+                'url': game.get('url'),
+                'is_free': game.get('is_free', False),
+                'discount_percent': game.get('discount_percent', 0)
+            })
@@ -0,0 +1,304 @@
+"""
+Offline Steam app index
+Streams Steam's full app list, external-sorts it by normalized name and serves
+exact name -> appid lookups from memory-mapped files on disk
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import codecs
+import heapq
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import time
+from array import array
+
+from core.config import settings
+from core.normalize import normalize_title
+
+logger = logging.getLogger(__name__)
+
+APP_LIST_URL = "https://api.steampowered.com/ISteamApps/GetAppList/v2/"
+
+DATA_FILE = 'apps.tsv'  # sorted "normalized name\tappid\tdisplay name\n" records
+OFFSETS_FILE = 'apps.idx'  # uint32 byte offset of every record, for binary search
+
+_APPS_ARRAY = re.compile(r'"apps"\s*:\s*\[')
+_SKIP = re.compile(r'[\s,]*')
+_CONTROL = re.compile(r'[\t\r\n]+')
+
+# (normalized name, appid, display name)
+AppRecord = Tuple[bytes, int, bytes]
+
+
+class AppListParser:
+    """
+    Incremental parser for {"applist": {"apps": [{...}, ...]}}.
+    Feed it raw chunks; it yields each app object as soon as it is complete,
+    so only the current chunk and one partial object are ever held in memory.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._in_array = False
+        self.done = False
+
+    def feed(self, chunk: bytes) -> Iterator[Dict[str, Any]]:
+        self._buffer += self._text.decode(chunk)
+        pos = 0
+
+        if not self._in_array:
+            match = _APPS_ARRAY.search(self._buffer)
+            if not match:
+                return
+            pos = match.end()
+            self._in_array = True
+
+        while not self.done:
+            pos = _SKIP.match(self._buffer, pos).end()
+            if pos >= len(self._buffer):
+                break
+            if self._buffer[pos] == ']':
+                self.done = True
+                break
+            try:
+                app, pos = self._decoder.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                break  # Object continues in the next chunk
+            yield app
+
+        self._buffer = self._buffer[pos:]
+
+
+def _encode(record: AppRecord) -> bytes:
+    return record[0] + b'\t' + str(record[1]).encode() + b'\t' + record[2] + b'\n'
+
+
+def _write_run(records: List[AppRecord], directory: str) -> str:
+    """Sort one batch of records and spill it to a run file"""
+    records.sort()
+    fd, path = tempfile.mkstemp(suffix='.run', dir=directory)
+    with os.fdopen(fd, 'wb') as run:
+        for record in records:
+            run.write(_encode(record))
+    return path
+
+
+def _read_run(path: str) -> Iterator[AppRecord]:
+    with open(path, 'rb') as run:
+        for line in run:
+            name, app_id, display_name = line.rstrip(b'\n').split(b'\t', 2)
+            yield name, int(app_id), display_name
+
+
+def _merge_runs(run_paths: List[str], data_path: str, offsets_path: str) -> int:
+    """k-way merge the sorted runs into the final data + offsets files; returns record count"""
+    count = 0
+    previous = None
+    with open(data_path, 'wb') as data, open(offsets_path, 'wb') as offsets:
+        batch = array('I')
+        position = 0
+        for record in heapq.merge(*(_read_run(path) for path in run_paths)):
+            if record == previous:
+                continue
+            previous = record
+            line = _encode(record)
+            batch.append(position)
+            data.write(line)
+            position += len(line)
+            count += 1
+            if len(batch) >= 8192:
+                batch.tofile(offsets)
+                batch = array('I')
+        batch.tofile(offsets)
+    return count
+
+
+class _IndexReader:
+    """Binary search over the memory-mapped sorted records"""
+
+    def __init__(self, directory: str):
+        self._data_file = open(os.path.join(directory, DATA_FILE), 'rb')
+        self._offsets_file = open(os.path.join(directory, OFFSETS_FILE), 'rb')
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets_map = mmap.mmap(self._offsets_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = memoryview(self._offsets_map).cast('I')
+        self.count = len(self._offsets)
+
+    def close(self):
+        self._offsets.release()
+        self._offsets_map.close()
+        self._data.close()
+        self._offsets_file.close()
+        self._data_file.close()
+
+    def _key(self, i: int) -> bytes:
+        start = self._offsets[i]
+        return self._data[start:self._data.find(b'\t', start)]
+
+    def _record(self, i: int) -> Tuple[str, int, str]:
+        start = self._offsets[i]
+        line = self._data[start:self._data.find(b'\n', start)]
+        name, app_id, display_name = line.split(b'\t', 2)
+        return name.decode(), int(app_id), display_name.decode()
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def exact(self, name: str) -> List[int]:
+        key = name.encode()
+        app_ids = []
+        i = self._lower_bound(key)
+        while i < self.count and self._key(i) == key:
+            app_ids.append(self._record(i)[1])
+            i += 1
+        return app_ids
+
+
+class SteamAppIndex:
+    """On-disk normalized name -> Steam appid index, refreshed on a schedule"""
+
+    def __init__(self, directory: str, refresh_hours: float, retry_seconds: float = 300.0, run_size: int = 50000):
+        self.directory = directory
+        self.refresh_seconds = refresh_hours * 3600
+        self.retry_seconds = retry_seconds
+        self.run_size = max(1000, run_size)
+        self._reader: Optional[_IndexReader] = None
+        self._task: Optional[asyncio.Task] = None
+        self._built_at: Optional[float] = None
+        self._last_refresh_ms = 0.0
+
+    @property
+    def available(self) -> bool:
+        return self._reader is not None
+
+    async def start(self):
+        """Open the existing index and keep it refreshed in the background"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._open()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _open(self):
+        data_path = os.path.join(self.directory, DATA_FILE)
+        if not os.path.exists(data_path) or os.path.getsize(data_path) == 0:
+            return
+        try:
+            reader = _IndexReader(self.directory)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not open Steam app index: {e}")
+            return
+        previous, self._reader = self._reader, reader
+        self._built_at = os.path.getmtime(data_path)
+        if previous is not None:
+            previous.close()
+        logger.info(f"🗂️ Steam app index ready with {reader.count} apps")
+
+    async def _run(self):
+        while True:
+            age = time.time() - self._built_at if self._built_at else None
+            if age is None or age >= self.refresh_seconds:
+                try:
+                    await self.refresh()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # Retry soon instead of waiting out the whole refresh interval
+                    logger.error(f"Steam app index refresh failed, retrying in {self.retry_seconds:.0f}s: {e}")
+                    await asyncio.sleep(self.retry_seconds)
+                    continue
+                age = time.time() - self._built_at if self._built_at else 0
+            await asyncio.sleep(max(60.0, self.refresh_seconds - age))
+
+    async def refresh(self) -> int:
+        """Download the app list and rebuild the index; returns the number of apps"""
+        from core.http_client import http_client
+
+        started = time.perf_counter()
+        work_dir = tempfile.mkdtemp(prefix='steam-apps-', dir=self.directory)
+        try:
+            parser = AppListParser()
+            records: List[AppRecord] = []
+            runs: List[str] = []
+
+            async with http_client.stream('GET', APP_LIST_URL, timeout=120) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    for app in parser.feed(chunk):
+                        display_name = _CONTROL.sub(' ', app.get('name') or '').strip()
+                        name = normalize_title(display_name)
+                        app_id = app.get('appid')
+                        if name and isinstance(app_id, int):
+                            records.append((name.encode(), app_id, display_name.encode()))
+                    if len(records) >= self.run_size:
+                        runs.append(await asyncio.to_thread(_write_run, records, work_dir))
+                        records = []
+
+            if not parser.done:
+                raise ValueError("Steam app list ended before the apps array was complete")
+            if records:
+                runs.append(await asyncio.to_thread(_write_run, records, work_dir))
+            if not runs:
+                raise ValueError("Steam app list was empty")
+
+            data_tmp = os.path.join(work_dir, DATA_FILE)
+            offsets_tmp = os.path.join(work_dir, OFFSETS_FILE)
+            count = await asyncio.to_thread(_merge_runs, runs, data_tmp, offsets_tmp)
+
+            # Readers keep their own mapping of the old files until _open swaps them out
+            os.replace(offsets_tmp, os.path.join(self.directory, OFFSETS_FILE))
+            os.replace(data_tmp, os.path.join(self.directory, DATA_FILE))
+            self._open()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        self._last_refresh_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"🗂️ Steam app index rebuilt: {count} apps in {self._last_refresh_ms:.0f}ms")
+        return count
+
+    def lookup(self, title: str) -> Optional[int]:
+        """Steam appid for an exact (normalized) title; the oldest app wins on duplicates"""
+        if self._reader is None:
+            return None
+        app_ids = self._reader.exact(normalize_title(title))
+        return min(app_ids) if app_ids else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'available': self.available,
+            'apps': self._reader.count if self._reader else 0,
+            'built_at': self._built_at,
+            'last_refresh_ms': round(self._last_refresh_ms, 2),
+        }
+
+
+steam_app_index = SteamAppIndex(
+    directory=settings.steam_app_index_path,
+    refresh_hours=settings.steam_app_index_refresh_hours,
+    retry_seconds=settings.steam_app_index_retry_seconds
+)
@@ -1,13 +1,36 @@
 """
 Supabase service for data persistence
 """
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
+import asyncio
 import logging
-from supabase import create_client, Client
+import time
+from core import metrics
 from core.config import settings
+from core.normalize import normalize_title
+from services.catalog_index import CatalogIndex, CATALOG_COLUMNS
+from services.steam_app_index import steam_app_index
+from services.title_matcher import match_titles
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
+# Columns written when games are bulk upserted (every row must share the same keys)
+GAME_COLUMNS = ('title', 'normalized_title', 'steam_app_id', 'epic_slug', 'description', 'image_url')
+
+# Stores with rows in price_history
+PRICE_STORES = ('steam', 'epic')
+
+# IDs per PostgREST in_ filter: the list goes into the GET URL, which servers cap at a few KB
+IN_FILTER_CHUNK = 100
+
+
+def chunked(ids: List[str], size: int = IN_FILTER_CHUNK) -> List[List[str]]:
+    return [ids[start:start + size] for start in range(0, len(ids), size)]
+
 
 class SupabaseService:
     """Service for interacting with Supabase database"""
@@ -16,41 +39,104 @@ class SupabaseService:
         if not settings.supabase_url or not settings.supabase_service_key:
             raise ValueError("Supabase URL and service key must be configured")
 
-        self.client: Client = create_client(
-            settings.supabase_url,
-            settings.supabase_service_key
+        # Created on first use: importing supabase is a large share of cold start
+        self._client: Optional['Client'] = None
+
+        # The Supabase client is synchronous: run every execute() on a bounded
+        # pool of worker threads so database round-trips never block the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.supabase_pool_size),
+            thread_name_prefix="supabase"
         )
 
+        # In-memory index of every known game, loaded at startup and kept current on inserts
+        self.catalog = CatalogIndex(min_score=settings.catalog_min_score)
+
+    @property
+    def client(self) -> 'Client':
+        """The Supabase client, imported and created on first access"""
+        if self._client is None:
+            from supabase import create_client
+
+            self._client = create_client(
+                settings.supabase_url,
+                settings.supabase_service_key
+            )
+        return self._client
+
+    async def _execute(self, operation: str, query) -> Any:
+        """Run a built PostgREST query on the Supabase thread pool, timed as operation"""
+        histogram = metrics.supabase_seconds.labels(operation)
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, query.execute)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
     async def test_connection(self):
         """Test database connection"""
         try:
             # Simple query to test connection
-            result = self.client.table('games').select('id').limit(1).execute()
+            result = await self._execute('test_connection', self.client.table('games').select('id').limit(1))
             logger.info("Supabase connection test successful")
         except Exception as e:
             logger.error(f"Supabase connection test failed: {e}")
             raise
 
+    async def warm_up(self):
+        """Test the connection and spin up every worker thread before traffic arrives"""
+        # Import and build the client on a worker thread rather than on the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, lambda: self.client)
+        await self.test_connection()
+        await asyncio.gather(*(
+            self._execute('warm_up', self.client.table('games').select('id').limit(1))
+            for _ in range(max(1, settings.supabase_pool_size) - 1)
+        ))
+
+    async def load_catalog(self, page_size: int = 1000) -> int:
+        """Load every game into the in-memory catalog index, page by page"""
+        start = 0
+        columns = ', '.join(CATALOG_COLUMNS)
+        while True:
+            result = await self._execute(
+                'load_catalog',
+                self.client.table('games').select(columns).order('id').range(start, start + page_size - 1)
+            )
+            page = result.data or []
+            self.catalog.add_many(page)
+            if len(page) < page_size:
+                break
+            start += page_size
+
+        self.catalog.loaded = True
+        logger.info(f"📚 Catalog index loaded with {len(self.catalog)} games")
+        return len(self.catalog)
+
+    def search_catalog(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Known games matching a search query, from the in-memory index"""
+        return self.catalog.search(self._normalize_title(query), limit)
+
+    def close(self):
+        """Release the worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
     async def match_and_merge_results(self, steam_results: List[Dict], epic_results: List[Dict]) -> List[Dict]:
         """Match games between Steam and Epic results and merge data"""
         merged_games = []
 
-        # Create lookup maps
-        steam_map = {self._normalize_title(g['title']): g for g in steam_results}
-        epic_map = {self._normalize_title(g['title']): g for g in epic_results}
-
-        # Get all unique titles
-        all_titles = set(steam_map.keys()) | set(epic_map.keys())
+        # Pair results that are the same game on both stores, keyed by normalized title
+        pairs = self._pair_store_results(steam_results, epic_results)
 
-        for title in all_titles:
-            normalized_title = title
+        # Create or update every game record in one batched lookup + upsert
+        game_records = await self._get_or_create_games(pairs)
 
-            # Get data from both stores
-            steam_data = steam_map.get(normalized_title)
-            epic_data = epic_map.get(normalized_title)
-
-            # Create or update game record
-            game_record = await self._get_or_create_game(steam_data, epic_data)
+        for normalized_title, (steam_data, epic_data) in pairs.items():
+            game_record = game_records.get(normalized_title)
+            if not game_record:
+                logger.warning(f"No game record for '{normalized_title}', skipping")
+                continue
 
             # Prepare price data
             prices = {}
@@ -78,6 +164,43 @@ class SupabaseService:
 
         return merged_games
 
+    def _pair_store_results(self, steam_results: List[Dict],
+                            epic_results: List[Dict]) -> Dict[str, Tuple[Optional[Dict], Optional[Dict]]]:
+        """
+        Pair Steam and Epic results for the same game.
+        Store IDs already in the catalog reuse their stored match, equal titles pair up,
+        and the rest go through the fuzzy title matcher.
+        """
+        def result_key(store: str, store_id_field: str, game: Dict) -> str:
+            known = self.catalog.find_by_store_id(store, game.get(store_id_field))
+            return known['normalized_title'] if known else self._normalize_title(game['title'])
+
+        pairs: Dict[str, Tuple[Optional[Dict], Optional[Dict]]] = {}
+        for game in steam_results:
+            pairs[result_key('steam', 'steam_app_id', game)] = (game, None)
+
+        unmatched_epic: Dict[str, Dict] = {}
+        for game in epic_results:
+            key = result_key('epic', 'epic_slug', game)
+            if key in pairs:
+                pairs[key] = (pairs[key][0], game)
+            else:
+                unmatched_epic[key] = game
+
+        matches = match_titles(
+            {key: steam['title'] for key, (steam, epic) in pairs.items() if epic is None},
+            {key: epic['title'] for key, epic in unmatched_epic.items()},
+            settings.title_match_threshold
+        )
+        for steam_key, epic_key, score in matches:
+            pairs[steam_key] = (pairs[steam_key][0], unmatched_epic.pop(epic_key))
+            logger.debug(f"Matched '{steam_key}' with Epic '{epic_key}' ({score:.2f})")
+
+        for key, game in unmatched_epic.items():
+            pairs[key] = (None, game)
+
+        return pairs
+
     async def _get_or_create_game(self, steam_data: Optional[Dict], epic_data: Optional[Dict]) -> Dict[str, Any]:
         """Get existing game or create new one"""
         # Determine primary data source
@@ -85,140 +208,287 @@ class SupabaseService:
         if not primary_data:
             raise ValueError("No game data provided")
 
-        title = primary_data['title']
-        normalized_title = self._normalize_title(title)
+        normalized_title = self._normalize_title(primary_data['title'])
+        games = await self._get_or_create_games({normalized_title: (steam_data, epic_data)})
+        return games[normalized_title]
+
+    async def _get_or_create_games(self, store_data: Dict[str, Tuple[Optional[Dict], Optional[Dict]]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get or create many games at once, keyed by normalized title.
+        One SELECT finds existing rows, then new and changed rows are upserted in bulk.
+        """
+        if not store_data:
+            return {}
+
+        existing = await self._execute(
+            'find_games',
+            self.client.table('games').select('*').in_('normalized_title', list(store_data.keys()))
+        )
+        existing_map = {row['normalized_title']: row for row in existing.data or []}
+
+        games: Dict[str, Dict[str, Any]] = {}
+        new_rows = []
+        changed_rows = []
+
+        for normalized_title, (steam_data, epic_data) in store_data.items():
+            primary_data = steam_data or epic_data
+            if not primary_data:
+                continue
+
+            game = existing_map.get(normalized_title)
+            if game:
+                # Update with additional data if available
+                update_data = {}
+                if steam_data and not game.get('steam_app_id'):
+                    update_data['steam_app_id'] = steam_data['steam_app_id']
+                elif not game.get('steam_app_id'):
+                    local_app_id = self._local_steam_app_id(normalized_title)
+                    if local_app_id:
+                        update_data['steam_app_id'] = local_app_id
+                if epic_data and not game.get('epic_slug'):
+                    update_data['epic_slug'] = epic_data['epic_slug']
+                if primary_data.get('description') and not game.get('description'):
+                    update_data['description'] = primary_data['description']
+                if primary_data.get('image_url') and not game.get('image_url'):
+                    update_data['image_url'] = primary_data['image_url']
+
+                games[normalized_title] = {**game, **update_data}
+                if update_data:
+                    changed_rows.append(self._game_row({**game, **update_data}))
+                continue
+
+            # Create new game
+            new_rows.append(self._game_row({
+                'title': primary_data['title'],
+                'normalized_title': normalized_title,
+                'description': primary_data.get('description'),
+                'image_url': primary_data.get('image_url'),
+                'steam_app_id': steam_data['steam_app_id'] if steam_data else self._local_steam_app_id(normalized_title),
+                'epic_slug': epic_data['epic_slug'] if epic_data else None,
+            }))
+
+        if new_rows:
+            # DO NOTHING on conflict: a concurrent search may have inserted the same
+            # title since our SELECT, and its row must not be overwritten with nulls
+            result = await self._execute(
+                'insert_games',
+                self.client.table('games').upsert(new_rows, on_conflict='normalized_title', ignore_duplicates=True)
+            )
+            for row in result.data or []:
+                games[row['normalized_title']] = row
+
+            raced = [row['normalized_title'] for row in new_rows if row['normalized_title'] not in games]
+            if raced:
+                result = await self._execute(
+                    'find_games',
+                    self.client.table('games').select('*').in_('normalized_title', raced)
+                )
+                for row in result.data or []:
+                    games[row['normalized_title']] = row
 
-        # Check if game already exists
-        existing = self.client.table('games').select('*').eq('normalized_title', normalized_title).execute()
+        if changed_rows:
+            result = await self._execute(
+                'update_games',
+                self.client.table('games').upsert(changed_rows, on_conflict='normalized_title')
+            )
+            for row in result.data or []:
+                games[row['normalized_title']] = row
 
-        if existing.data:
-            game = existing.data[0]
-            # Update with additional data if available
-            update_data = {}
-            if steam_data and not game.get('steam_app_id'):
-                update_data['steam_app_id'] = steam_data['steam_app_id']
-            if epic_data and not game.get('epic_slug'):
-                update_data['epic_slug'] = epic_data['epic_slug']
-            if primary_data.get('description') and not game.get('description'):
-                update_data['description'] = primary_data['description']
-            if primary_data.get('image_url') and not game.get('image_url'):
-                update_data['image_url'] = primary_data['image_url']
-
-            if update_data:
-                self.client.table('games').update(update_data).eq('id', game['id']).execute()
-
-            return game
-
-        # Create new game
-        game_data = {
-            'title': title,
-            'normalized_title': normalized_title,
-            'description': primary_data.get('description'),
-            'image_url': primary_data.get('image_url'),
-        }
+        self.catalog.add_many(games.values())
+        return games
 
-        if steam_data:
-            game_data['steam_app_id'] = steam_data['steam_app_id']
-        if epic_data:
-            game_data['epic_slug'] = epic_data['epic_slug']
+    def _local_steam_app_id(self, normalized_title: str) -> Optional[str]:
+        """Steam app ID for an exact title from the offline app index, without a network call"""
+        app_id = steam_app_index.lookup(normalized_title)
+        return str(app_id) if app_id else None
 
-        result = self.client.table('games').insert(game_data).execute()
-        return result.data[0]
+    def _game_row(self, game: Dict[str, Any]) -> Dict[str, Any]:
+        """Games row with a fixed column set, as bulk upserts require"""
+        return {column: game.get(column) for column in GAME_COLUMNS}
 
     async def save_price_history(self, game_id: str, steam_price: Optional[float], epic_price: Optional[float]):
         """Save price history for both stores"""
+        await self.save_price_history_bulk(self.price_history_rows(game_id, steam_price, epic_price))
+
+    def price_history_rows(self, game_id: str, steam_price: Optional[float], epic_price: Optional[float],
+                           scraped_at: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Build price_history rows for the stores that returned a price"""
         from datetime import datetime
 
-        now = datetime.utcnow().isoformat()
-
-        if steam_price is not None:
-            self.client.table('price_history').insert({
-                'game_id': game_id,
-                'store': 'steam',
-                'price': steam_price,
-                'is_free': steam_price == 0,
-                'scraped_at': now
-            }).execute()
-
-        if epic_price is not None:
-            self.client.table('price_history').insert({
-                'game_id': game_id,
-                'store': 'epic',
-                'price': epic_price,
-                'is_free': epic_price == 0,
-                'scraped_at': now
-            }).execute()
+        now = scraped_at or datetime.utcnow().isoformat()
+        rows = []
+
+        for store, price in zip(PRICE_STORES, (steam_price, epic_price)):
+            if price is not None:
+                rows.append({
+                    'game_id': game_id,
+                    'store': store,
+                    'price': price,
+                    'is_free': price == 0,
+                    'scraped_at': now
+                })
+
+        return rows
+
+    async def save_price_history_bulk(self, rows: List[Dict[str, Any]]):
+        """Insert many price_history rows with a single multi-row INSERT"""
+        if not rows:
+            return
+        await self._execute('save_price_history', self.client.table('price_history').insert(rows))
+
+    async def add_to_wishlist(self, user_id: str, game_id: str, target_price: Optional[float] = None):
+        """Add a game to a wishlist, or update its target price if already there"""
+        existing = await self._execute(
+            'add_to_wishlist',
+            self.client.table('wishlist').select('*').eq('user_id', user_id).eq('game_id', game_id)
+        )
+
+        if existing.data:
+            # Update target price if provided
+            if target_price is not None:
+                await self._execute('add_to_wishlist', self.client.table('wishlist').update({
+                    'target_price': target_price
+                }).eq('user_id', user_id).eq('game_id', game_id))
+            return
+
+        wishlist_data: Dict[str, Any] = {
+            'user_id': user_id,
+            'game_id': game_id
+        }
+        if target_price is not None:
+            wishlist_data['target_price'] = target_price
+
+        await self._execute('add_to_wishlist', self.client.table('wishlist').insert(wishlist_data))
 
     async def get_game_by_id(self, game_id: str) -> Optional[Dict[str, Any]]:
         """Get game by ID"""
-        result = self.client.table('games').select('*').eq('id', game_id).execute()
+        result = await self._execute('get_game_by_id', self.client.table('games').select('*').eq('id', game_id))
         return result.data[0] if result.data else None
 
     async def log_user_search(self, user_id: str, query: str):
         """Log user search for AI analysis"""
         try:
-            self.client.table('user_searches').insert({
+            await self._execute('log_user_search', self.client.table('user_searches').insert({
                 'user_id': user_id,
                 'query': query
-            }).execute()
+            }))
         except Exception as e:
             logger.warning(f"Failed to log user search: {e}")
 
     async def check_and_create_notifications(self, user_id: str, game_id: str,
                                            steam_price: Optional[float], epic_price: Optional[float]) -> int:
-        """Check for price changes and create notifications"""
-        notifications_created = 0
-
-        try:
-            # Get user's wishlist entry
-            wishlist_result = self.client.table('wishlist').select('*').eq('user_id', user_id).eq('game_id', game_id).execute()
-
-            if not wishlist_result.data:
-                return 0
-
-            wishlist_item = wishlist_result.data[0]
-            target_price = wishlist_item.get('target_price')
-
-            # Get previous price from history
-            history_result = self.client.table('price_history').select('*').eq('game_id', game_id).order('scraped_at', desc=True).limit(2).execute()
-
-            if len(history_result.data) < 2:
-                return 0  # No previous price to compare
-
-            previous_price = history_result.data[1]['price']  # Second most recent
-            current_price = history_result.data[0]['price']   # Most recent
-
-            # Check for target price reached
-            if target_price and current_price <= target_price:
-                await self._create_notification(
-                    user_id, game_id, 'target_reached',
-                    f"Price target reached! Now {current_price}€ (target: {target_price}€)"
+        """
+        Check for price changes and create notifications.
+        Must run before the fresh prices are saved to price_history.
+        """
+        from services.notification_evaluator import NotificationEvaluator
+
+        evaluator = NotificationEvaluator(self)
+        return await evaluator.evaluate_and_notify({user_id: {game_id: {'steam': steam_price, 'epic': epic_price}}})
+
+    async def get_games_by_ids(self, game_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get many games by ID, one query per chunk of IDs"""
+        games: List[Dict[str, Any]] = []
+        for chunk in chunked(game_ids):
+            result = await self._execute('get_games_by_ids', self.client.table('games').select('*').in_('id', chunk))
+            games.extend(result.data or [])
+        return games
+
+    async def get_wishlist_watchers(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """Every (user_id, game_id, target_price) wishlist row, read page by page in primary key order"""
+        rows: List[Dict[str, Any]] = []
+        start = 0
+        while True:
+            result = await self._execute(
+                'get_wishlist_watchers',
+                self.client.table('wishlist').select('user_id, game_id, target_price')
+                .order('id').range(start, start + page_size - 1)
+            )
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            start += page_size
+
+    async def get_wishlist_targets(self, user_ids: List[str], game_ids: List[str]) -> List[Dict[str, Any]]:
+        """Wishlist rows for any of the given users and games, one query per chunk of IDs"""
+        rows: List[Dict[str, Any]] = []
+        for user_chunk in chunked(user_ids):
+            for game_chunk in chunked(game_ids):
+                result = await self._execute(
+                    'get_wishlist_targets',
+                    self.client.table('wishlist').select('user_id, game_id, target_price')
+                    .in_('user_id', user_chunk).in_('game_id', game_chunk)
                 )
-                notifications_created += 1
-
-            # Check for significant price drop (>10%)
-            if previous_price and current_price and previous_price > 0:
-                drop_percent = ((previous_price - current_price) / previous_price) * 100
-                if drop_percent >= 10:
-                    await self._create_notification(
-                        user_id, game_id, 'price_drop',
-                        f"Price dropped {drop_percent:.1f}%! Now {current_price}€ (was {previous_price}€)"
-                    )
-                    notifications_created += 1
-
-        except Exception as e:
-            logger.error(f"Error checking notifications: {e}")
-
-        return notifications_created
+                rows.extend(result.data or [])
+        return rows
+
+    async def get_target_notifications(self, user_ids: List[str], game_ids: List[str]) -> List[Dict[str, Any]]:
+        """target_reached notifications already sent to any of the given users for any of the given games"""
+        rows: List[Dict[str, Any]] = []
+        for user_chunk in chunked(user_ids):
+            for game_chunk in chunked(game_ids):
+                result = await self._execute(
+                    'get_target_notifications',
+                    self.client.table('notifications').select('user_id, game_id, message')
+                    .eq('type', 'target_reached').in_('user_id', user_chunk).in_('game_id', game_chunk)
+                )
+                rows.extend(result.data or [])
+        return rows
+
+    async def get_latest_prices(self, game_ids: List[str]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Most recent price_history row per (game_id, store), one query per chunk of IDs"""
+        rows: List[Dict[str, Any]] = []
+        for chunk in chunked(game_ids):
+            try:
+                result = await self._execute(
+                    'get_latest_prices',
+                    self.client.table('latest_store_prices').select('game_id, store, price, scraped_at')
+                    .in_('game_id', chunk)
+                )
+            except Exception as e:
+                # Databases without the latest_store_prices view: newest row per (game, store) instead
+                logger.warning(f"latest_store_prices view unavailable, querying price_history per game: {e}")
+                rows.extend(await self._latest_history_rows(chunk))
+                continue
+            rows.extend(result.data or [])
+
+        latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for row in rows:
+            key = (str(row['game_id']), row['store'])
+            if key not in latest or (row.get('scraped_at') or '') > (latest[key].get('scraped_at') or ''):
+                latest[key] = row
+        return latest
+
+    async def _latest_history_rows(self, game_ids: List[str]) -> List[Dict[str, Any]]:
+        """Newest price_history row for every (game, store), one indexed limit-1 query each"""
+        async def newest(game_id: str, store: str) -> List[Dict[str, Any]]:
+            result = await self._execute(
+                'get_latest_prices',
+                self.client.table('price_history').select('game_id, store, price, scraped_at')
+                .eq('game_id', game_id).eq('store', store).order('scraped_at', desc=True).limit(1)
+            )
+            return result.data or []
+
+        # The worker pool bounds how many run at once
+        pages = await asyncio.gather(*(newest(game_id, store) for game_id in game_ids for store in PRICE_STORES))
+        return [row for page in pages for row in page]
+
+    async def create_notifications_bulk(self, notifications: List[Dict[str, Any]]) -> int:
+        """Insert many notifications with a single multi-row INSERT"""
+        if not notifications:
+            return 0
+        await self._execute('create_notifications', self.client.table('notifications').insert(notifications))
+        return len(notifications)
 
     async def _create_notification(self, user_id: str, game_id: str, notification_type: str, message: str):
         """Create a notification"""
-        self.client.table('notifications').insert({
+        await self._execute('create_notifications', self.client.table('notifications').insert({
             'user_id': user_id,
             'game_id': game_id,
             'type': notification_type,
             'message': message
-        }).execute()
+        }))
 
     async def save_ai_insight(self, user_id: str, insight_type: str, content: Dict[str, Any]):
         """Save AI insight to Supabase for persistence and cross-device sync"""
@@ -226,17 +496,17 @@ class SupabaseService:
 
         expires_at = datetime.utcnow() + timedelta(days=7)
 
-        self.client.table('ai_insights').insert({
+        await self._execute('save_ai_insight', self.client.table('ai_insights').insert({
             'user_id': user_id,
             'insight_type': insight_type,
             'content': content,
             'expires_at': expires_at.isoformat()
-        }).execute()
+        }))
 
     async def get_price_history(self, game_id: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get price history for a game"""
         try:
-            result = self.client.table('price_history').select('*').eq('game_id', game_id).order('scraped_at', desc=True).limit(limit).execute()
+            result = await self._execute('get_price_history', self.client.table('price_history').select('*').eq('game_id', game_id).order('scraped_at', desc=True).limit(limit))
             return result.data if result.data else []
         except Exception as e:
             logger.error(f"Failed to get price history for game {game_id}: {e}")
@@ -244,12 +514,4 @@ class SupabaseService:
 
     def _normalize_title(self, title: str) -> str:
         """Normalize game title for matching"""
-        if not title:
-            return ""
-
-        # Convert to lowercase, remove special characters, extra spaces
-        normalized = title.lower()
-        normalized = ''.join(c for c in normalized if c.isalnum() or c.isspace())
-        normalized = ' '.join(normalized.split())  # Remove extra spaces
-
-        return normalized
+        return normalize_title(title)
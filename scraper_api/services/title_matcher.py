@@ -0,0 +1,85 @@
+"""
+Fuzzy cross-store title matching
+Canonical token sets (editions stripped, roman numerals as digits) compared with a
+Dice score, using a token blocking index instead of comparing every pair
+"""
+from typing import Dict, FrozenSet, List, NamedTuple, Tuple
+import re
+
+from core.normalize import normalize_title
+
+# Trailing edition/packaging words that don't change which game it is
+EDITION_SUFFIX = re.compile(
+    r'(?:\s+(?:edition|ultimate|deluxe|digital|gold|complete|definitive|standard|premium|enhanced|'
+    r'special|collectors|legendary|anniversary|game of the year|goty|directors cut|remastered|bundle))+$'
+)
+STOPWORDS = frozenset({'the', 'a', 'an', 'of', 'and'})
+ROMAN_NUMERALS = {
+    'ii': '2', 'iii': '3', 'iv': '4', 'v': '5', 'vi': '6', 'vii': '7', 'viii': '8', 'ix': '9', 'x': '10',
+    'xi': '11', 'xii': '12', 'xiii': '13', 'xiv': '14', 'xv': '15', 'xvi': '16',
+}
+
+
+class CanonicalTitle(NamedTuple):
+    tokens: FrozenSet[str]
+    numbers: FrozenSet[str]  # sequel numbers must agree exactly: "hades" is not "hades ii"
+
+
+def canonical_title(title: str) -> CanonicalTitle:
+    """Token set used for matching (™/® and punctuation are dropped by normalize_title)"""
+    normalized = normalize_title(title)
+    stripped = EDITION_SUFFIX.sub('', normalized) or normalized
+
+    tokens = [ROMAN_NUMERALS.get(token, token) for token in stripped.split() if token not in STOPWORDS]
+    return CanonicalTitle(
+        tokens=frozenset(tokens),
+        numbers=frozenset(token for token in tokens if token.isdigit())
+    )
+
+
+def similarity(left: CanonicalTitle, right: CanonicalTitle) -> float:
+    """Dice coefficient of the token sets, 0 when sequel numbers differ"""
+    if left.numbers != right.numbers or not left.tokens or not right.tokens:
+        return 0.0
+    return 2 * len(left.tokens & right.tokens) / (len(left.tokens) + len(right.tokens))
+
+
+def match_titles(left: Dict[str, str], right: Dict[str, str],
+                 threshold: float) -> List[Tuple[str, str, float]]:
+    """
+    One-to-one matches between two {key: title} maps, best scores first.
+    Only pairs sharing at least one non-numeric token are scored.
+    """
+    left_canonical = {key: canonical_title(title) for key, title in left.items()}
+    right_canonical = {key: canonical_title(title) for key, title in right.items()}
+
+    # Blocking index: token -> right keys containing it
+    blocks: Dict[str, List[str]] = {}
+    for key, canonical in right_canonical.items():
+        for token in canonical.tokens - canonical.numbers:
+            blocks.setdefault(token, []).append(key)
+
+    candidates = []
+    for left_key, canonical in left_canonical.items():
+        seen = set()
+        for token in canonical.tokens - canonical.numbers:
+            for right_key in blocks.get(token, ()):
+                if right_key in seen:
+                    continue
+                seen.add(right_key)
+                score = similarity(canonical, right_canonical[right_key])
+                if score >= threshold:
+                    candidates.append((score, left_key, right_key))
+
+    # Greedy assignment, best pairs first
+    candidates.sort(key=lambda candidate: (-candidate[0], candidate[1], candidate[2]))
+    matched_left, matched_right = set(), set()
+    matches = []
+    for score, left_key, right_key in candidates:
+        if left_key in matched_left or right_key in matched_right:
+            continue
+        matched_left.add(left_key)
+        matched_right.add(right_key)
+        matches.append((left_key, right_key, score))
+
+    return matches
@@ -86,6 +86,70 @@ class APITester:
                 'error': str(e)
             }
 
+    async def test_search_stream(self, query: str = "cyberpunk") -> Dict[str, Any]:
+        """Test streaming search endpoint (NDJSON events)"""
+        print(f"📡 Testing streaming search for: {query}")
+        try:
+            events = []
+            async with self.session.post(
+                f"{self.base_url}/api/search/stream",
+                json={'query': query},
+                headers={'Content-Type': 'application/json'}
+            ) as response:
+                async for line in response.content:
+                    if line.strip():
+                        events.append(json.loads(line))
+
+            names = [event['event'] for event in events]
+            done = events[-1] if events else {}
+            success = (
+                response.status == 200
+                and names[-1:] == ['done']
+                and 'merged' in names
+                and 'search_time' in done
+                and 'time_to_first_result' in done
+            )
+
+            return {
+                'test': 'search_stream',
+                'success': success,
+                'status_code': response.status,
+                'events': names,
+                'time_to_first_result': done.get('time_to_first_result'),
+                'search_time': done.get('search_time')
+            }
+        except Exception as e:
+            return {
+                'test': 'search_stream',
+                'success': False,
+                'error': str(e)
+            }
+
+    async def test_metrics(self) -> Dict[str, Any]:
+        """Test Prometheus metrics endpoint"""
+        print("📈 Testing metrics endpoint...")
+        try:
+            async with self.session.get(f"{self.base_url}/metrics") as response:
+                text = await response.text()
+                expected = [
+                    'gameprice_http_request_seconds_bucket',
+                    'gameprice_search_stage_seconds_count{stage="match_merge"}',
+                    'gameprice_cache_requests_total{cache="search",result="hit"}',
+                ]
+                missing = [name for name in expected if name not in text]
+                return {
+                    'test': 'metrics',
+                    'success': response.status == 200 and not missing,
+                    'status_code': response.status,
+                    'missing': missing
+                }
+        except Exception as e:
+            return {
+                'test': 'metrics',
+                'success': False,
+                'error': str(e)
+            }
+
     async def test_refresh_wishlist(self, user_id: str = "test-user", game_ids: list = None) -> Dict[str, Any]:
         """Test wishlist refresh endpoint"""
         if game_ids is None:
@@ -204,6 +268,16 @@ class APITester:
         results.append(search_result)
         print(f"Game Search: {'✅ PASS' if search_result['success'] else '❌ FAIL'}")
 
+        # Test streaming search
+        stream_result = await self.test_search_stream()
+        results.append(stream_result)
+        print(f"Streaming Search: {'✅ PASS' if stream_result['success'] else '❌ FAIL'}")
+
+        # Test metrics (after the searches so request histograms have samples)
+        metrics_result = await self.test_metrics()
+        results.append(metrics_result)
+        print(f"Metrics: {'✅ PASS' if metrics_result['success'] else '❌ FAIL'}")
+
         # Test wishlist refresh
         wishlist_result = await self.test_refresh_wishlist()
         results.append(wishlist_result)
@@ -224,6 +298,9 @@ class APITester:
         if search_result['success'] and 'search_time' in search_result:
             search_time = search_result['search_time']
             print(f"⚡ Search Performance: {search_time:.2f}s {'(Good)' if search_time < 5.0 else '(Slow)'}")
+        if stream_result['success'] and stream_result['time_to_first_result'] is not None:
+            print(f"⚡ Streaming first result: {stream_result['time_to_first_result']:.2f}s "
+                  f"(total {stream_result['search_time']:.2f}s)")
 
         return {
             'summary': {
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Epic catalog client tests against recorded fixtures
+Serves fixtures/epic/*.json from a local stub server, so no network access is needed
+Run with: python test_epic_catalog.py
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'epic')
+
+# keywords -> (status, fixture file)
+SEARCH_FIXTURES = {
+    'cyberpunk': (200, 'search_cyberpunk.json'),
+    'cyberpunk 2077': (200, 'search_cyberpunk.json'),
+    'nothing here': (200, 'search_empty.json'),
+    'broken': (200, 'graphql_error.json'),
+}
+
+
+def load_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as fixture:
+        return fixture.read()
+
+
+def request_keywords(payload: Dict[str, Any]) -> Dict[str, str]:
+    """Response field -> keywords: 'searchStore' for a single search, s0, s1, ... for a batch"""
+    variables = payload.get('variables', {})
+    if 'keywords' in variables:
+        return {'searchStore': variables['keywords']}
+    return {f"s{name[1:]}": value for name, value in variables.items() if re.fullmatch(r'k\d+', name)}
+
+
+class StubEpicHandler(BaseHTTPRequestHandler):
+    """Answers the catalog GraphQL endpoint and freeGamesPromotions from fixtures"""
+
+    requests = []
+
+    def _reply(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        StubEpicHandler.requests.append(payload)
+        searches = request_keywords(payload)
+        if self.path != '/graphql' or any(keywords not in SEARCH_FIXTURES for keywords in searches.values()):
+            self._reply(500, b'{"errors": [{"message": "unexpected request"}]}')
+            return
+
+        if list(searches) == ['searchStore']:
+            status, fixture = SEARCH_FIXTURES[searches['searchStore']]
+            self._reply(status, load_fixture(fixture))
+            return
+
+        # Batched request: answer every aliased search from its own fixture
+        catalog = {}
+        for alias, keywords in searches.items():
+            answer = json.loads(load_fixture(SEARCH_FIXTURES[keywords][1]))
+            if answer.get('errors'):
+                self._reply(200, json.dumps(answer).encode())
+                return
+            catalog[alias] = answer['data']['Catalog']['searchStore']
+        self._reply(200, json.dumps({'data': {'Catalog': catalog}}).encode())
+
+    def do_GET(self):
+        if self.path.startswith('/freeGamesPromotions'):
+            self._reply(200, load_fixture('free_games_promotions.json'))
+        else:
+            self._reply(404, b'{}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubEpicHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+server = start_stub_server()
+STUB_URL = f"http://127.0.0.1:{server.server_address[1]}"
+
+# Point the app at the stub before its settings are imported
+os.environ['EPIC_GRAPHQL_URL'] = f"{STUB_URL}/graphql"
+os.environ['EPIC_FREE_GAMES_URL'] = f"{STUB_URL}/freeGamesPromotions"
+os.environ['BROWSER_POOL_ENABLED'] = 'false'
+os.environ['MAX_RETRIES'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.http_client import http_client  # noqa: E402
+from scrapers.epic_catalog import EpicCatalogClient, EpicCatalogError  # noqa: E402
+from scrapers.epic_scraper import EpicScraper  # noqa: E402
+from services.price_resolver import resolve_missing_prices  # noqa: E402
+
+GAME_KEYS = {'title', 'epic_slug', 'url', 'image_url', 'price', 'discount_percent', 'is_free', 'store'}
+
+
+async def test_search_maps_store_schema() -> Dict[str, Any]:
+    """Catalog elements become EpicScraper-style game dicts"""
+    games = await EpicCatalogClient().search('cyberpunk')
+    by_slug = {game['epic_slug']: game for game in games}
+
+    base = by_slug['cyberpunk-2077']
+    ultimate = by_slug['cyberpunk-2077-ultimate-edition']
+    free = by_slug['cyberpunk-mini-jam']
+
+    assert len(games) == 3, f"expected 3 games (soundtrack has no store page), got {len(games)}"
+    assert all(set(game) == GAME_KEYS for game in games), "game dicts must keep the scraper schema"
+    assert base['price'] == 29.99 and base['discount_percent'] == 50 and not base['is_free']
+    assert base['url'] == "https://store.epicgames.com/p/cyberpunk-2077"
+    assert base['image_url'].endswith('/thumb.jpg'), "Thumbnail is the preferred image"
+    assert ultimate['price'] == 79.99 and ultimate['discount_percent'] == 0
+    assert free['price'] == 0 and free['is_free'] and free['image_url'] is None
+    return {'test': 'search_maps_store_schema', 'success': True, 'games': len(games)}
+
+
+async def test_search_sends_catalog_query() -> Dict[str, Any]:
+    """The GraphQL request carries the keywords, country and game categories"""
+    StubEpicHandler.requests.clear()
+    await EpicCatalogClient().search('cyberpunk', count=5)
+    variables = StubEpicHandler.requests[-1]['variables']
+    assert variables['keywords'] == 'cyberpunk' and variables['count'] == 5
+    assert variables['country'] == 'US' and 'games/edition/base' in variables['category']
+    return {'test': 'search_sends_catalog_query', 'success': True}
+
+
+async def test_empty_search() -> Dict[str, Any]:
+    games = await EpicCatalogClient().search('nothing here')
+    assert games == []
+    return {'test': 'empty_search', 'success': True}
+
+
+async def test_get_by_slug() -> Dict[str, Any]:
+    game = await EpicCatalogClient().get_by_slug('cyberpunk-2077')
+    assert game and game['title'] == 'Cyberpunk 2077' and game['description'].startswith('Cyberpunk 2077 is')
+    return {'test': 'get_by_slug', 'success': True}
+
+
+async def test_graphql_errors_raise() -> Dict[str, Any]:
+    try:
+        await EpicCatalogClient().search('broken')
+    except EpicCatalogError as e:
+        return {'test': 'graphql_errors_raise', 'success': True, 'error': str(e)}
+    raise AssertionError("GraphQL errors must raise EpicCatalogError")
+
+
+async def test_scraper_uses_catalog_first() -> Dict[str, Any]:
+    async with EpicScraper() as scraper:
+        games = await scraper.search_games('cyberpunk')
+    assert [game['epic_slug'] for game in games][0] == 'cyberpunk-2077'
+    return {'test': 'scraper_uses_catalog_first', 'success': True}
+
+
+async def test_scraper_falls_back_without_browser() -> Dict[str, Any]:
+    """A failing catalog with no browser available ends at the free games fallback"""
+    async with EpicScraper() as scraper:
+        games = await scraper.search_games('broken')
+    assert [game['title'] for game in games] == ['Broken Age'], games
+    return {'test': 'scraper_falls_back_without_browser', 'success': True}
+
+
+async def test_get_by_slug_with_keywords() -> Dict[str, Any]:
+    """Searched by title first; the exact slug picks the edition"""
+    StubEpicHandler.requests.clear()
+    game = await EpicCatalogClient().get_by_slug('cyberpunk-2077-ultimate-edition', keywords='cyberpunk')
+    assert game and game['price'] == 79.99
+    assert [list(request_keywords(r).values()) for r in StubEpicHandler.requests] == [['cyberpunk']]
+    return {'test': 'get_by_slug_with_keywords', 'success': True}
+
+
+async def test_get_by_slugs_keeps_successful_batches() -> Dict[str, Any]:
+    """A failed batch request only loses its own searches"""
+    from scrapers import epic_catalog
+
+    StubEpicHandler.requests.clear()
+    batch_size = epic_catalog.SEARCH_BATCH_SIZE
+    epic_catalog.SEARCH_BATCH_SIZE = 1
+    try:
+        found = await EpicCatalogClient().get_by_slugs({'cyberpunk-2077': 'cyberpunk 2077', 'broken-age': 'broken'})
+    finally:
+        epic_catalog.SEARCH_BATCH_SIZE = batch_size
+    assert list(found) == ['cyberpunk-2077'], found
+    assert len(StubEpicHandler.requests) == 3, "one request per search, then the slug words of the missing one"
+    return {'test': 'get_by_slugs_keeps_successful_batches', 'success': True}
+
+
+async def test_resolver_fills_missing_epic_prices() -> Dict[str, Any]:
+    """Missing Epic prices are looked up in one batched request and applied in place; repeats hit the price cache"""
+    def merged():
+        return [
+            {'game': {'id': '1', 'title': 'cyberpunk 2077', 'epic_slug': 'cyberpunk-2077'}, 'prices': {}},
+            {'game': {'id': '2', 'title': 'cyberpunk', 'epic_slug': 'cyberpunk-2077-ultimate-edition'}, 'prices': {}},
+            {'game': {'id': '3', 'title': 'Known', 'epic_slug': 'known'}, 'prices': {'epic': {'price': 5.0}}},
+        ]
+
+    StubEpicHandler.requests.clear()
+    results = merged()
+    updated = await resolve_missing_prices(results)
+    assert [game_data['game']['id'] for game_data in updated] == ['1', '2']
+    assert results[0]['prices']['epic']['price'] == 29.99
+    assert results[0]['prices']['epic']['url'] == "https://store.epicgames.com/p/cyberpunk-2077"
+    assert results[1]['prices']['epic']['price'] == 79.99
+    assert results[2]['prices']['epic'] == {'price': 5.0}, "existing prices are left alone"
+    assert len(StubEpicHandler.requests) == 1, "one batched catalog request for every missing slug"
+    assert sorted(request_keywords(StubEpicHandler.requests[0]).values()) == ['cyberpunk', 'cyberpunk 2077']
+
+    StubEpicHandler.requests.clear()
+    assert len(await resolve_missing_prices(merged())) == 2
+    assert StubEpicHandler.requests == [], "second resolution must come from the price cache"
+    return {'test': 'resolver_fills_missing_epic_prices', 'success': True}
+
+
+async def main() -> int:
+    print("🧪 Epic catalog client tests (stub server at " + STUB_URL + ")")
+    tests = [
+        test_search_maps_store_schema,
+        test_search_sends_catalog_query,
+        test_empty_search,
+        test_get_by_slug,
+        test_graphql_errors_raise,
+        test_get_by_slug_with_keywords,
+        test_get_by_slugs_keeps_successful_batches,
+        test_resolver_fills_missing_epic_prices,
+        test_scraper_uses_catalog_first,
+        test_scraper_falls_back_without_browser,
+    ]
+
+    failures = 0
+    await http_client.start()
+    try:
+        for test in tests:
+            try:
+                result = await test()
+                print(f"✅ {result['test']}")
+            except Exception as e:
+                failures += 1
+                print(f"❌ {test.__name__}: {e!r}")
+    finally:
+        await http_client.close()
+        server.shutdown()
+
+    print(f"\n{len(tests) - failures}/{len(tests)} passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Startup tests: boots the app in-process with default settings
+Only Supabase credentials are supplied (an unroutable URL), so no network access is needed
+Run with: python test_startup.py
+"""
+
+import os
+import sys
+from typing import Any, Dict
+
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('SUPABASE_SERVICE_KEY', 'test')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from core.config import settings  # noqa: E402
+from core.profiling import loop_lag_monitor  # noqa: E402
+
+
+def test_boots_with_default_settings() -> Dict[str, Any]:
+    """Startup hooks run with every default-on feature (loop lag monitor included)"""
+    assert settings.loop_lag_monitor_enabled, "the lag monitor is on by default"
+    with TestClient(main.app) as client:
+        response = client.get('/health')
+        assert response.status_code == 200 and response.json()['status'] == 'healthy'
+        assert loop_lag_monitor.stats()['running'], "loop lag monitor must be running after startup"
+        assert client.get('/ready').status_code in (200, 503)
+    assert not loop_lag_monitor.stats()['running'], "shutdown stops the monitor"
+    return {'test': 'boots_with_default_settings', 'success': True}
+
+
+def main_tests() -> int:
+    print("🧪 Startup tests")
+    tests = [
+        test_boots_with_default_settings,
+    ]
+
+    failures = 0
+    for test in tests:
+        try:
+            result = test()
+            print(f"✅ {result['test']}")
+        except Exception as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e!r}")
+
+    print(f"\n{len(tests) - failures}/{len(tests)} passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_tests())
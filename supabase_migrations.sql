@@ -138,3 +138,11 @@ DROP POLICY IF EXISTS "Users can update their own notifications" ON notification
 CREATE POLICY "Users can update their own notifications" ON notifications FOR UPDATE USING (auth.uid() = user_id);
 
 -- Políticas para ai_insights removidas - tabla ya no existe
+
+-- Último precio por juego y tienda (usado para evaluar notificaciones en bloque)
+CREATE INDEX IF NOT EXISTS idx_price_history_game_store_scraped ON price_history(game_id, store, scraped_at DESC);
+
+CREATE OR REPLACE VIEW latest_store_prices AS
+SELECT DISTINCT ON (game_id, store) game_id, store, price, is_free, scraped_at
+FROM price_history
+ORDER BY game_id, store, scraped_at DESC;